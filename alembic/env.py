@@ -20,6 +20,7 @@ if config.config_file_name is not None:
 from app.models import (
     credit_model,
     message_model,
+    structured_query_cache_model,
     talent_model,
     talent_query_model,
 )
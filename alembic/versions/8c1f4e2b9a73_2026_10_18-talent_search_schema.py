@@ -0,0 +1,199 @@
+"""talent search schema
+
+Brings a database created before the talent search work up to the models:
+the talents get a unique core_signal_id, the compressed raw payload, the
+collection and view times, and the local search indexes. The talent
+queries get the packed result ids, the status, the search mode and the
+pipeline accounting columns, and the structured query cache table is
+created.
+
+Every step is idempotent, so it is safe on a database that already has
+some of these changes, e.g. one created from the models.
+
+Revision ID: 8c1f4e2b9a73
+Revises:
+Create Date: 2026-10-18 03:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c1f4e2b9a73"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# the local search indexes, built without locking the talents table
+TALENT_SEARCH_INDEXES = {
+    "ix_talents_title_trgm": "USING gin (title gin_trgm_ops)",
+    "ix_talents_location_trgm": "USING gin (location gin_trgm_ops)",
+    "ix_talents_member_education_collection": (
+        "USING gin (member_education_collection jsonb_path_ops)"
+    ),
+    "ix_talents_member_experience_collection": (
+        "USING gin (member_experience_collection jsonb_path_ops)"
+    ),
+    "ix_talents_member_skills_collection": (
+        "USING gin (member_skills_collection jsonb_path_ops)"
+    ),
+}
+
+
+def has_table(table_name: str) -> bool:
+    # an offline (--sql) run has no database to inspect, the script assumes it
+    if op.get_context().as_sql:
+        return True
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade() -> None:
+    if has_table("talents"):
+        upgrade_talents()
+    if has_table("talent_queries"):
+        upgrade_talent_queries()
+    upgrade_structured_query_caches()
+
+
+def upgrade_talents() -> None:
+    # the trigram indexes of the title and location ILIKE filters
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute(
+        """
+        ALTER TABLE talents
+            ADD COLUMN IF NOT EXISTS raw_payload bytea,
+            ADD COLUMN IF NOT EXISTS updated_at timestamp without time zone,
+            ADD COLUMN IF NOT EXISTS last_viewed_at timestamp without time zone
+        """
+    )
+
+    # keep the most recently stored row of each talent before making the
+    # core_signal_id unique, the upsert relies on it
+    op.execute(
+        """
+        DELETE FROM talents AS older
+        USING talents AS newer
+        WHERE older.core_signal_id = newer.core_signal_id
+            AND (COALESCE(older.created_at, 'epoch'), older.id)
+                < (COALESCE(newer.created_at, 'epoch'), newer.id)
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_talents_core_signal_id "
+            "ON talents (core_signal_id)"
+        )
+        for index_name, index_definition in TALENT_SEARCH_INDEXES.items():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+                f"ON talents {index_definition}"
+            )
+
+
+def upgrade_talent_queries() -> None:
+    # the server defaults fill the rows saved before, which are all finished
+    # upstream searches
+    op.execute(
+        """
+        ALTER TABLE talent_queries
+            ADD COLUMN IF NOT EXISTS structured_query_source varchar(20),
+            ADD COLUMN IF NOT EXISTS query_result_ids bytea,
+            ADD COLUMN IF NOT EXISTS result_count integer,
+            ADD COLUMN IF NOT EXISTS status varchar(20) NOT NULL DEFAULT 'done',
+            ADD COLUMN IF NOT EXISTS error_message text,
+            ADD COLUMN IF NOT EXISTS search_mode varchar(20) NOT NULL
+                DEFAULT 'upstream',
+            ADD COLUMN IF NOT EXISTS llm_model_name varchar,
+            ADD COLUMN IF NOT EXISTS llm_input_tokens integer,
+            ADD COLUMN IF NOT EXISTS llm_output_tokens integer,
+            ADD COLUMN IF NOT EXISTS llm_cost_usd double precision,
+            ADD COLUMN IF NOT EXISTS llm_latency_ms integer,
+            ADD COLUMN IF NOT EXISTS structuring_latency_ms integer,
+            ADD COLUMN IF NOT EXISTS search_latency_ms integer
+        """
+    )
+    # the legacy result ids stay in query_result, only their count is copied
+    op.execute(
+        """
+        UPDATE talent_queries
+        SET result_count = COALESCE(cardinality(query_result), 0)
+        WHERE result_count IS NULL AND query_result_ids IS NULL
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_talent_queries_created_at "
+            "ON talent_queries (created_at)"
+        )
+
+
+def upgrade_structured_query_caches() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS structured_query_caches (
+            id varchar(36) PRIMARY KEY,
+            cache_key varchar(64) NOT NULL,
+            normalized_query text NOT NULL,
+            model_version varchar(100) NOT NULL,
+            structured_query jsonb NOT NULL,
+            hit_count integer NOT NULL,
+            expires_at timestamp without time zone NOT NULL,
+            created_at timestamp without time zone
+        )
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_structured_query_caches_cache_key "
+        "ON structured_query_caches (cache_key)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS structured_query_caches")
+    if has_table("talent_queries"):
+        downgrade_talent_queries()
+    if has_table("talents"):
+        downgrade_talents()
+
+
+def downgrade_talent_queries() -> None:
+    # the results saved as packed ids only are lost
+    op.execute("DROP INDEX IF EXISTS ix_talent_queries_created_at")
+    op.execute(
+        """
+        ALTER TABLE talent_queries
+            DROP COLUMN IF EXISTS search_latency_ms,
+            DROP COLUMN IF EXISTS structuring_latency_ms,
+            DROP COLUMN IF EXISTS llm_latency_ms,
+            DROP COLUMN IF EXISTS llm_cost_usd,
+            DROP COLUMN IF EXISTS llm_output_tokens,
+            DROP COLUMN IF EXISTS llm_input_tokens,
+            DROP COLUMN IF EXISTS llm_model_name,
+            DROP COLUMN IF EXISTS search_mode,
+            DROP COLUMN IF EXISTS error_message,
+            DROP COLUMN IF EXISTS status,
+            DROP COLUMN IF EXISTS result_count,
+            DROP COLUMN IF EXISTS query_result_ids,
+            DROP COLUMN IF EXISTS structured_query_source
+        """
+    )
+
+
+def downgrade_talents() -> None:
+    # the removed duplicate talents are not restored
+    for index_name in [*TALENT_SEARCH_INDEXES, "ix_talents_core_signal_id"]:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    op.execute(
+        """
+        ALTER TABLE talents
+            DROP COLUMN IF EXISTS last_viewed_at,
+            DROP COLUMN IF EXISTS updated_at,
+            DROP COLUMN IF EXISTS raw_payload
+        """
+    )
@@ -17,10 +17,137 @@ class Settings(BaseSettings):
 
     # anthropic
     ANTHROPIC_API_KEY: str = os.environ.get("ANTHROPIC_API_KEY")
+    # send a one token request on startup to open the LLM connection
+    LLM_WARM_UP_PING: bool = os.environ.get("LLM_WARM_UP_PING", False)
 
     # talent pool
     TALENT_POOL_TOKEN: str = os.environ.get("TALENT_POOL_TOKEN")
     TALENT_POOL_URL: str = os.environ.get("TALENT_POOL_URL")
+    TALENT_POOL_MAX_CONNECTIONS: int = os.environ.get("TALENT_POOL_MAX_CONNECTIONS", 100)
+    TALENT_POOL_KEEPALIVE_SECONDS: float = os.environ.get(
+        "TALENT_POOL_KEEPALIVE_SECONDS", 30
+    )
+    TALENT_POOL_DNS_CACHE_SECONDS: int = os.environ.get(
+        "TALENT_POOL_DNS_CACHE_SECONDS", 300
+    )
+    TALENT_POOL_CONNECT_TIMEOUT_SECONDS: float = os.environ.get(
+        "TALENT_POOL_CONNECT_TIMEOUT_SECONDS", 5
+    )
+    TALENT_POOL_TIMEOUT_SECONDS: float = os.environ.get(
+        "TALENT_POOL_TIMEOUT_SECONDS", 30
+    )
+    TALENT_POOL_COLLECT_CONCURRENCY_INITIAL: int = os.environ.get(
+        "TALENT_POOL_COLLECT_CONCURRENCY_INITIAL", 10
+    )
+    TALENT_POOL_COLLECT_CONCURRENCY_MIN: int = os.environ.get(
+        "TALENT_POOL_COLLECT_CONCURRENCY_MIN", 2
+    )
+    TALENT_POOL_COLLECT_CONCURRENCY_MAX: int = os.environ.get(
+        "TALENT_POOL_COLLECT_CONCURRENCY_MAX", 50
+    )
+    TALENT_POOL_COLLECT_LATENCY_TARGET_SECONDS: float = os.environ.get(
+        "TALENT_POOL_COLLECT_LATENCY_TARGET_SECONDS", 3
+    )
+    TALENT_POOL_HEDGE_PERCENTILE: float = os.environ.get(
+        "TALENT_POOL_HEDGE_PERCENTILE", 95
+    )
+    # share of the /collect calls that may be hedged
+    TALENT_POOL_HEDGE_BUDGET_RATIO: float = os.environ.get(
+        "TALENT_POOL_HEDGE_BUDGET_RATIO", 0.05
+    )
+    TALENT_POOL_RETRY_ATTEMPTS: int = os.environ.get("TALENT_POOL_RETRY_ATTEMPTS", 3)
+    TALENT_POOL_RETRY_BUDGET_RATIO: float = os.environ.get(
+        "TALENT_POOL_RETRY_BUDGET_RATIO", 0.2
+    )
+    TALENT_POOL_RETRY_MAX_WAIT_SECONDS: float = os.environ.get(
+        "TALENT_POOL_RETRY_MAX_WAIT_SECONDS", 2
+    )
+    TALENT_POOL_CIRCUIT_FAILURE_THRESHOLD: int = os.environ.get(
+        "TALENT_POOL_CIRCUIT_FAILURE_THRESHOLD", 10
+    )
+    TALENT_POOL_CIRCUIT_RESET_SECONDS: float = os.environ.get(
+        "TALENT_POOL_CIRCUIT_RESET_SECONDS", 30
+    )
+
+    # cached talent profiles
+    TALENT_FRESHNESS_DAYS: int = os.environ.get("TALENT_FRESHNESS_DAYS", 30)
+    TALENT_REFRESH_CONCURRENCY: int = os.environ.get("TALENT_REFRESH_CONCURRENCY", 4)
+    TALENT_STALE_REFRESH_ENABLED: bool = os.environ.get(
+        "TALENT_STALE_REFRESH_ENABLED", True
+    )
+    TALENT_STALE_REFRESH_INTERVAL_SECONDS: float = os.environ.get(
+        "TALENT_STALE_REFRESH_INTERVAL_SECONDS", 60
+    )
+    TALENT_STALE_REFRESH_BATCH_SIZE: int = os.environ.get(
+        "TALENT_STALE_REFRESH_BATCH_SIZE", 20
+    )
+    TALENT_JSON_CACHE_MAX_BYTES: int = os.environ.get(
+        "TALENT_JSON_CACHE_MAX_BYTES", 64 * 1024 * 1024
+    )
+
+    # search over the stored talents
+    TALENT_LOCAL_SEARCH_LIMIT: int = os.environ.get("TALENT_LOCAL_SEARCH_LIMIT", 1000)
+
+    # relevance ranking of the search results
+    TALENT_RERANK_ENABLED: bool = os.environ.get("TALENT_RERANK_ENABLED", True)
+    TALENT_RERANK_DEPTH: int = os.environ.get("TALENT_RERANK_DEPTH", 200)
+
+    # rule-based structuring of simple queries, without the LLM
+    RULE_BASED_PARSER_ENABLED: bool = os.environ.get("RULE_BASED_PARSER_ENABLED", True)
+    RULE_BASED_PARSER_MIN_CONFIDENCE: float = os.environ.get(
+        "RULE_BASED_PARSER_MIN_CONFIDENCE", 1.0
+    )
+
+    # talent pool search from the rule-based parse while the LLM is structuring
+    SPECULATIVE_SEARCH_ENABLED: bool = os.environ.get("SPECULATIVE_SEARCH_ENABLED", True)
+    SPECULATIVE_SEARCH_MIN_CONFIDENCE: float = os.environ.get(
+        "SPECULATIVE_SEARCH_MIN_CONFIDENCE", 0.5
+    )
+
+    # natural language to structured query cache
+    STRUCTURED_QUERY_CACHE_TTL_SECONDS: int = os.environ.get(
+        "STRUCTURED_QUERY_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60
+    )
+    STRUCTURED_QUERY_CACHE_MAX_SIZE: int = os.environ.get(
+        "STRUCTURED_QUERY_CACHE_MAX_SIZE", 1024
+    )
+
+    # talent pool search result cache
+    SEARCH_RESULT_CACHE_TTL_SECONDS: int = os.environ.get(
+        "SEARCH_RESULT_CACHE_TTL_SECONDS", 60 * 60
+    )
+    SEARCH_RESULT_CACHE_MAX_SIZE: int = os.environ.get(
+        "SEARCH_RESULT_CACHE_MAX_SIZE", 1024
+    )
+
+    # next result page prefetch
+    TALENT_PREFETCH_CONCURRENCY: int = os.environ.get(
+        "TALENT_PREFETCH_CONCURRENCY", 16
+    )
+    TALENT_PREFETCH_TIMEOUT_SECONDS: int = os.environ.get(
+        "TALENT_PREFETCH_TIMEOUT_SECONDS", 60
+    )
+
+    # background talent query jobs
+    TALENT_QUERY_JOB_WORKERS: int = os.environ.get("TALENT_QUERY_JOB_WORKERS", 8)
+    TALENT_QUERY_JOB_MAX_PENDING: int = os.environ.get(
+        "TALENT_QUERY_JOB_MAX_PENDING", 200
+    )
+    # unfinished talent queries older than this are failed at startup
+    TALENT_QUERY_INTERRUPTED_AFTER_SECONDS: int = os.environ.get(
+        "TALENT_QUERY_INTERRUPTED_AFTER_SECONDS", 15 * 60
+    )
+
+    # talent query batches
+    TALENT_QUERY_BATCH_MAX_SIZE: int = os.environ.get("TALENT_QUERY_BATCH_MAX_SIZE", 50)
+    TALENT_QUERY_BATCH_CONCURRENCY: int = os.environ.get(
+        "TALENT_QUERY_BATCH_CONCURRENCY", 8
+    )
+    # talent queries of a batch running at once, each holds a database session,
+    # so keep it within the connection pool size (5 by default)
+    TALENT_QUERY_BATCH_MAX_RUNNING: int = os.environ.get(
+        "TALENT_QUERY_BATCH_MAX_RUNNING", 5
+    )
 
     # profiler
     PROFILING_ENABLED: bool = os.environ.get("PROFILING_ENABLED")
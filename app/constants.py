@@ -60,3 +60,168 @@ CountryLiteral = Literal[
     "Slovenia",
     "Togdheer",
 ]
+
+# other names of the countries in CountryLiteral, for the rule-based query parser
+COUNTRY_ALIASES = {
+    "usa": "United States",
+    "u.s.": "United States",
+    "america": "United States",
+    "uk": "United Kingdom",
+    "england": "United Kingdom",
+    "britain": "United Kingdom",
+    "uae": "United Arab Emirates",
+    "dubai": "United Arab Emirates",
+    "south korea": "Korea",
+    "czechia": "Czech Republic",
+    "holland": "Netherlands",
+}
+
+# the nouns that end a job title, e.g. "senior python *engineer*"
+TITLE_ROLES = [
+    "engineer",
+    "developer",
+    "programmer",
+    "architect",
+    "scientist",
+    "analyst",
+    "manager",
+    "designer",
+    "consultant",
+    "researcher",
+    "recruiter",
+    "accountant",
+    "administrator",
+    "specialist",
+    "director",
+    "lawyer",
+    "marketer",
+    "cto",
+    "ceo",
+    "cfo",
+    "founder",
+]
+
+# the words before a role that are part of the job title
+TITLE_SENIORITIES = [
+    "senior",
+    "sr",
+    "junior",
+    "jr",
+    "lead",
+    "principal",
+    "staff",
+    "chief",
+    "head",
+    "intern",
+]
+TITLE_DOMAINS = [
+    "software",
+    "backend",
+    "back end",
+    "frontend",
+    "front end",
+    "full stack",
+    "fullstack",
+    "web",
+    "mobile",
+    "data",
+    "machine learning",
+    "ml",
+    "ai",
+    "cloud",
+    "devops",
+    "security",
+    "qa",
+    "test",
+    "embedded",
+    "game",
+    "product",
+    "project",
+    "program",
+    "engineering",
+    "marketing",
+    "sales",
+    "ux",
+    "ui",
+    "research",
+    "solutions",
+    "site reliability",
+    "business",
+    "financial",
+    "hr",
+    "talent",
+]
+
+# skills that are searched as keywords, or are part of the job title before a role
+TECHNOLOGIES = [
+    "python",
+    "java",
+    "javascript",
+    "typescript",
+    "golang",
+    "rust",
+    "c++",
+    "c#",
+    ".net",
+    "ruby",
+    "rails",
+    "php",
+    "scala",
+    "kotlin",
+    "swift",
+    "ios",
+    "android",
+    "react",
+    "angular",
+    "vue",
+    "node",
+    "node.js",
+    "django",
+    "flask",
+    "spring",
+    "sql",
+    "aws",
+    "azure",
+    "gcp",
+    "kubernetes",
+    "docker",
+    "terraform",
+    "spark",
+    "pytorch",
+    "tensorflow",
+    "llm",
+    "nlp",
+]
+
+COMPANIES = [
+    "Google",
+    "Meta",
+    "Facebook",
+    "Amazon",
+    "Apple",
+    "Microsoft",
+    "Netflix",
+    "Uber",
+    "Airbnb",
+    "Stripe",
+    "OpenAI",
+    "Anthropic",
+    "Nvidia",
+    "Tesla",
+    "Spotify",
+    "Shopify",
+    "Salesforce",
+    "Oracle",
+    "IBM",
+    "Intel",
+    "SAP",
+    "Adobe",
+    "LinkedIn",
+    "Twitter",
+    "ByteDance",
+    "Alibaba",
+    "Tencent",
+    "Booking.com",
+    "Zalando",
+    "Revolut",
+]
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.dependencies import get_db
+from app.enums.credit_type_enum import CreditTypeEnum
+from app.infrastructure.logger import log_message
+from app.services.credit_service import consume_credits
+from app.services.talent_service import get_talent_in_db, serialize_talent
+from app.user import models as user_model
+from app.user.services import get_current_user_base_on_config
+
+talent_router = APIRouter()
+
+
+@talent_router.get("/{core_signal_id}")
+def get_talent(
+    core_signal_id: str,
+    db_session: Session = Depends(get_db),
+    user: user_model.User = Depends(get_current_user_base_on_config),
+):
+    """Get all the details of a talent, including the member collections.
+
+    Only stored talents are found, and each call consumes a contact credit
+    like a talent in a talent query page does, since the stored talents
+    were paid for by any user.
+
+    Args:
+        core_signal_id (str): The talent id from the talent pool.
+        db_session (Session): The database session.
+        user (User): The current user.
+
+    Returns:
+        dict: The talent details.
+    """
+    log_message(
+        level="info",
+        event="Start get_talent",
+        user_id=user.id,
+        core_signal_id=core_signal_id,
+    )
+    talent = get_talent_in_db(core_signal_id=core_signal_id, db_session=db_session)
+    if not talent:
+        raise HTTPException(status_code=404, detail="Talent not found")
+
+    consume_credits(
+        user_id=user.id,
+        credit_type_name=CreditTypeEnum.CONTACT_CREDIT,
+        amount=1,
+        db_session=db_session,
+    )
+    return serialize_talent(talent)
@@ -2,23 +2,32 @@ import asyncio
 import logging.config
 import time
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.dependencies import get_db
-from app.dto.talent_query_dto import TalentQueryCreateDto
+from app.config.settings import settings
+from app.dto.talent_query_dto import TalentQueryBatchCreateDto, TalentQueryCreateDto
 from app.enums.credit_type_enum import CreditTypeEnum
+from app.enums.talent_fields_enum import TalentFieldsEnum
 from app.infrastructure.dependencies import get_pageable_param
 from app.infrastructure.logger import log_message
 from app.infrastructure.schemas import PageableParamDTO
 from app.models.talent_model import Talent
-from app.models.talent_query_model import TalentQuery
-from app.services.talent_pool_service import get_linkedin_member_ids_sync
+from app.services import rule_based_query_parser_service, talent_query_service
 from app.services.credit_service import consume_credits
-from app.services.structure_query_service import natural_language_to_structured_query
+from app.services.talent_prefetch_service import talent_prefetcher
+from app.services.talent_query_job_service import (
+    run_talent_query_batch,
+    talent_query_job_runner,
+)
+from app.services.talent_refresh_service import talent_refresher
 from app.services.talent_service import (
     get_talent_details_by_ids,  # Assuming this service exists
+    stream_talent_details_by_ids,
 )
 from app.user import models as user_model
 from app.user.services import get_current_user_base_on_config
@@ -27,78 +36,287 @@ talent_query_router = APIRouter()
 
 
 @talent_query_router.post("")
-def create_talent_query(
+async def create_talent_query(
     talent_query_create_dto: TalentQueryCreateDto,
     db_session: Session = Depends(get_db),
     user: user_model.User = Depends(get_current_user_base_on_config),
 ):
     """Use natural language query to create a talent query.
 
+    The LLM and talent pool calls are awaited and the database writes run in
+    the threadpool, so a slow query does not hold a worker thread. With
+    `background` set, the talent query id is returned at once and the query
+    runs in the background; poll `/{query_id}/status` for the progress.
+
     Args:
         talent_query_create_dto (TalentQueryCreateDto): The natural language query to create a talent query.
         db_session (Session): The database session.
         user (User): The user who created the talent query.
 
     Returns:
-        dict: The talent query id.
+        dict: The talent query id and status.
     """
     log_message(
         level="info",
         event="Start create_talent_query",
         user_id=user.id,
-        talent_query_create_dto=talent_query_create_dto.model_dump(),
+        talent_query_create_dto=talent_query_create_dto.model_dump(mode="json"),
     )
 
-    # get structured query from LLM
-    structured_query = natural_language_to_structured_query(
-        natural_language_query=talent_query_create_dto.nature_language_query
+    if talent_query_create_dto.background and talent_query_job_runner.is_full():
+        raise HTTPException(
+            status_code=503, detail="Too many talent queries in progress"
+        )
+
+    # save query to database
+    talent_query = await run_in_threadpool(
+        talent_query_service.create_talent_query,
+        nature_language_query=talent_query_create_dto.nature_language_query,
+        user_id=user.id,
+        db_session=db_session,
+        search_mode=talent_query_create_dto.search_mode,
+    )
+    log_message(
+        level="info",
+        event="Saved talent_query",
+        talent_query_id=talent_query.id,
     )
 
+    # loaded by create_talent_query, read before any later commit expires them
+    talent_query_id, status = talent_query.id, talent_query.status
+    if talent_query_create_dto.background:
+        talent_query_job_runner.submit(talent_query_id=talent_query_id)
+    else:
+        talent_query = await talent_query_service.run_talent_query(
+            talent_query=talent_query, db_session=db_session
+        )
+        # the commits expired the talent query, reading it again is a SELECT
+        status = await run_in_threadpool(getattr, talent_query, "status")
+
+    return {"talent_query_id": talent_query_id, "status": status}
+
+
+@talent_query_router.post("/batch")
+async def create_talent_query_batch(
+    talent_query_batch_create_dto: TalentQueryBatchCreateDto,
+    db_session: Session = Depends(get_db),
+    user: user_model.User = Depends(get_current_user_base_on_config),
+):
+    """Create a talent query for each natural language query and run them together.
+
+    At most `TALENT_QUERY_BATCH_MAX_RUNNING` queries run at a time, within
+    the database connection pool, and at most `TALENT_QUERY_BATCH_CONCURRENCY`
+    of them are structured by the LLM at once. A batch larger than that runs
+    in waves. A failed query does not fail the batch, its error is reported
+    on its item.
+
+    Args:
+        talent_query_batch_create_dto (TalentQueryBatchCreateDto): The natural language queries.
+        db_session (Session): The database session.
+        user (User): The user who created the talent queries.
+
+    Returns:
+        dict: One item per query, in the order of the queries.
+    """
     log_message(
         level="info",
-        event="Structured query generated",
-        structured_query=structured_query,
+        event="Start create_talent_query_batch",
+        user_id=user.id,
+        size=len(talent_query_batch_create_dto.nature_language_queries),
     )
 
-    # save query to database
-    # TODO: refactor below to service
-    talent_query = TalentQuery(
-        nature_language_query=talent_query_create_dto.nature_language_query,
-        structured_query=structured_query.get_talent_pool_query_dict(),
-        query_result=[],
+    talent_query_ids = await run_in_threadpool(
+        talent_query_service.create_talent_queries,
+        nature_language_queries=talent_query_batch_create_dto.nature_language_queries,
         user_id=user.id,
+        db_session=db_session,
+        search_mode=talent_query_batch_create_dto.search_mode,
+    )
+    items = await run_talent_query_batch(
+        talent_query_ids=talent_query_ids,
+        max_running=settings.TALENT_QUERY_BATCH_MAX_RUNNING,
+        max_llm_concurrency=settings.TALENT_QUERY_BATCH_CONCURRENCY,
     )
-    # TODO: count the token used
+    return {"data": items}
 
-    db_session.add(talent_query)
-    db_session.commit()
-    db_session.refresh(talent_query)
 
-    log_message(
-        level="info",
-        event="Saved talent_query",
-        # talent_query=talent_query.model_dump(),
+@talent_query_router.get("/stats")
+def get_talent_query_stats(
+    days: int = Query(default=7, ge=1, le=90),
+    db_session: Session = Depends(get_db),
+    user: user_model.User = Depends(get_current_user_base_on_config),
+):
+    """Get the p50/p95 latencies, tokens and cost of the user's talent queries per day.
+
+    Args:
+        days (int): The number of days to look back.
+        db_session (Session): The database session.
+        user (User): The current user.
+
+    Returns:
+        dict: The statistics of each day.
+    """
+    stats = talent_query_service.get_talent_query_stats(
+        user_id=user.id, days=days, db_session=db_session
+    )
+    return {"data": stats}
+
+
+@talent_query_router.get("/rule-based-parser/evaluation")
+def evaluate_rule_based_parser(
+    limit: int = Query(default=500, ge=1, le=10000),
+    db_session: Session = Depends(get_db),
+    user: user_model.User = Depends(get_current_user_base_on_config),
+):
+    """Compare the rule-based parser with the structured queries recorded from the LLM.
+
+    Only the user's own talent queries are compared.
+
+    Args:
+        limit (int): The number of most recent talent queries to compare.
+        db_session (Session): The database session.
+        user (User): The current user.
+
+    Returns:
+        dict: The hit rate and agreement of the parser, with a sample of the disagreements.
+    """
+    return rule_based_query_parser_service.evaluate_rule_based_parser(
+        limit=limit, user_id=user.id, db_session=db_session
+    )
+
+
+@talent_query_router.get("/{query_id}/status")
+def get_talent_query_status(
+    query_id: str,
+    db_session: Session = Depends(get_db),
+    user: user_model.User = Depends(get_current_user_base_on_config),
+):
+    """Get the progress of a talent query.
+
+    Args:
+        query_id (str): The talent query id.
+        db_session (Session): The database session.
+        user (User): The current user.
+
+    Returns:
+        dict: The talent query status, the error if it failed, and the number of results.
+    """
+    talent_query = talent_query_service.get_talent_query(
+        query_id=query_id, db_session=db_session
+    )
+    if not talent_query:
+        raise HTTPException(status_code=404, detail="Talent query not found")
+
+    return {
+        "talent_query_id": talent_query.id,
+        "status": talent_query.status,
+        "error": talent_query.error_message,
+        "total": talent_query.get_result_count(),
+    }
+
+
+def get_page_talent_ids_and_consume_credits(
+    query_id: str,
+    page_params: PageableParamDTO,
+    db_session: Session,
+    user: user_model.User,
+) -> tuple[list[str], list[str]]:
+    """Get the talent ids of the page and consume a contact credit for each of them.
+
+    Args:
+        query_id (str): The talent query id.
+        page_params (PageableParamDTO): The page params.
+        db_session (Session): The database session.
+        user (User): The current user.
+
+    Returns:
+        tuple[list[str], list[str]]: The talent ids of the page and of the next page.
+    """
+    # get the talent ids of this page and the next one from the talent query
+    result_ids = talent_query_service.get_talent_query_result_ids(
+        query_id=query_id,
+        offset=page_params.offset,
+        limit=2 * page_params.limit,
+        db_session=db_session,
     )
+    if result_ids is None:
+        raise HTTPException(status_code=404, detail="Talent query not found")
+
+    talent_ids: list[str] = result_ids[: page_params.limit]
+    next_page_talent_ids: list[str] = result_ids[page_params.limit :]
+
+    # consume credit for the user
+    consume_credits(
+        user_id=user.id,
+        credit_type_name=CreditTypeEnum.CONTACT_CREDIT,
+        amount=len(talent_ids),
+        db_session=db_session,
+    )
+    return talent_ids, next_page_talent_ids
+
+
+@talent_query_router.get("/{query_id}/stream")
+async def stream_talent_details(
+    query_id: str,
+    page_params: PageableParamDTO = Depends(get_pageable_param),
+    prefetch: bool = False,
+    fields: TalentFieldsEnum = TalentFieldsEnum.SUMMARY,
+    db_session: Session = Depends(get_db),
+    user: user_model.User = Depends(get_current_user_base_on_config),
+):
+    """Stream the talent details from the talent query as newline delimited JSON.
 
-    # use talent pool API to get talent ids
-    talent_ids = get_linkedin_member_ids_sync(params=structured_query)
-    # save talent ids to database
-    talent_query.query_result = talent_ids
-    db_session.commit()
-    db_session.refresh(talent_query)
-    # return talent_query_i
+    Talents already stored are sent at once, then each talent collected from
+    the talent pool API as it arrives, so the first candidates can be shown
+    without waiting for the slowest one.
+
+    Args:
+        query_id (str): The talent query id.
+        page_params (PageableParamDTO): The page params.
+        prefetch (bool): Whether to collect the talents of the next page in the background.
+        fields (TalentFieldsEnum): The summary columns, or all columns of each talent.
+        db_session (Session): The database session.
+        user (User): The user who created the talent query.
+
+    Returns:
+        StreamingResponse: One talent per line.
+    """
     log_message(
         level="info",
-        event="Saved talent_query with results",
-        # talent_query=talent_query.model_dump(),
+        event="Start stream_talent_details",
+        user_id=user.id,
+        query_id=query_id,
+        page_params=page_params.model_dump(),
+    )
+    talent_ids, next_page_talent_ids = await run_in_threadpool(
+        get_page_talent_ids_and_consume_credits,
+        query_id=query_id,
+        page_params=page_params,
+        db_session=db_session,
+        user=user,
     )
-    return {"talent_query_id": talent_query.id}
+
+    async def talent_lines():
+        async for talent_detail in stream_talent_details_by_ids(
+            talent_ids=talent_ids,
+            db_session=db_session,
+            on_stale=talent_refresher.schedule,
+            fields=fields,
+        ):
+            yield talent_detail + b"\n"
+
+        if prefetch:
+            talent_prefetcher.schedule(user_id=user.id, talent_ids=next_page_talent_ids)
+
+    return StreamingResponse(talent_lines(), media_type="application/x-ndjson")
 
 
 @talent_query_router.get("/{query_id}")
 async def get_talent_details(
     query_id: str,
     page_params: PageableParamDTO = Depends(get_pageable_param),
+    prefetch: bool = False,
+    fields: TalentFieldsEnum = TalentFieldsEnum.SUMMARY,
     db_session: Session = Depends(get_db),
     user: user_model.User = Depends(get_current_user_base_on_config),
 ):
@@ -107,6 +325,8 @@ async def get_talent_details(
     Args:
         query_id (str): The talent query id.
         page_params (PageableParamDTO): The page params.
+        prefetch (bool): Whether to collect the talents of the next page in the background.
+        fields (TalentFieldsEnum): The summary columns, or all columns of each talent.
         db_session (Session): The database session.
         user (User): The user who created the talent query.
 
@@ -121,35 +341,35 @@ async def get_talent_details(
         query_id=query_id,
         page_params=page_params.model_dump(),
     )
-    # get talent query object from database
-    talent_query = (
-        db_session.query(TalentQuery).filter(TalentQuery.id == query_id).first()
-    )
-    if not talent_query:
-        raise HTTPException(status_code=404, detail="Talent query not found")
-
-    # get talent ids from talent query object, use the page params to get the talent ids
-    talent_ids: list[str] = talent_query.query_result[
-        page_params.offset : page_params.offset + page_params.limit
-    ]
-
-    # consume credit for the user
-    consume_credits(
-        user_id=user.id,
-        credit_type_name=CreditTypeEnum.CONTACT_CREDIT,
-        amount=len(talent_ids),
+    talent_ids, next_page_talent_ids = await run_in_threadpool(
+        get_page_talent_ids_and_consume_credits,
+        query_id=query_id,
+        page_params=page_params,
         db_session=db_session,
+        user=user,
     )
 
     # get talent details from talent pool API
     talent_details = await get_talent_details_by_ids(
-        talent_ids=talent_ids, db_session=db_session
+        talent_ids=talent_ids,
+        db_session=db_session,
+        on_stale=talent_refresher.schedule,
+        fields=fields,
     )
 
+    # collect the next page while the user reads this one
+    if prefetch:
+        talent_prefetcher.schedule(user_id=user.id, talent_ids=next_page_talent_ids)
+
     # TODO: use PageableResultDTO
-    return {
-        "total": len(talent_ids),
-        "page": page_params.page,
-        "size": page_params.limit,
-        "data": talent_details,
-    }
+    # the talent details are already JSON, only the envelope is added
+    return Response(
+        content=b'{"total":%d,"page":%d,"size":%d,"data":[%s]}'
+        % (
+            len(talent_ids),
+            page_params.page,
+            page_params.limit,
+            b",".join(talent_details),
+        ),
+        media_type="application/json",
+    )
@@ -2,6 +2,10 @@ from langchain_core.pydantic_v1 import BaseModel, Field
 
 from app.constants import CountryLiteral
 from app.utils.list_utils import list_to_or_string
+from app.utils.search_params_utils import (
+    canonicalize_talent_pool_query_dict,
+    get_talent_pool_query_hash,
+)
 
 
 class LinkedInSearchParamsDto(BaseModel):
@@ -79,11 +83,9 @@ class LinkedInSearchParamsDto(BaseModel):
             params_dict.pop("keyword")
 
         # if list is empty, remove the query param
-        params_dict["experience_title"] = list_to_or_string(
-            params_dict.get("experience_title")
-        )
-        params_dict["country"] = list_to_or_string(params_dict.get("country"))
-        params_dict["keyword"] = list_to_or_string(params_dict.get("keyword"))
+        for key in ("experience_title", "country", "keyword"):
+            if key in params_dict:
+                params_dict[key] = list_to_or_string(params_dict[key])
 
         ###############################
         # string
@@ -102,4 +104,16 @@ class LinkedInSearchParamsDto(BaseModel):
         if params_dict.get("location") == "":
             params_dict.pop("location")
 
-        return params_dict
\ No newline at end of file
+        return params_dict
+
+    def get_canonical_query_dict(self) -> dict:
+        """
+        Canonical form of the talent pool query dictionary, equal for equivalent searches.
+        """
+        return canonicalize_talent_pool_query_dict(self.get_talent_pool_query_dict())
+
+    def get_search_hash(self) -> str:
+        """
+        Stable hash of the canonical talent pool query, used as the search cache key.
+        """
+        return get_talent_pool_query_hash(self.get_talent_pool_query_dict())
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class LLMUsageDto(BaseModel):
+    """Tokens, cost and latency of one LLM call"""
+
+    model_name: str
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    cost_usd: float | None = None
+    latency_ms: int
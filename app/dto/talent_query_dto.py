@@ -1,7 +1,22 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.config.settings import settings
+from app.enums.search_mode_enum import SearchModeEnum
 
 
 class TalentQueryCreateDto(BaseModel):
     """Talent query DTO"""
 
     nature_language_query: str
+    # return the talent query id at once and run the query in the background
+    background: bool = False
+    search_mode: SearchModeEnum = SearchModeEnum.UPSTREAM
+
+
+class TalentQueryBatchCreateDto(BaseModel):
+    """Talent query batch DTO"""
+
+    nature_language_queries: list[str] = Field(
+        min_length=1, max_length=settings.TALENT_QUERY_BATCH_MAX_SIZE
+    )
+    search_mode: SearchModeEnum = SearchModeEnum.UPSTREAM
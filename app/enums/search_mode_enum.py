@@ -0,0 +1,14 @@
+import enum
+
+
+class SearchModeEnum(enum.Enum):
+    """
+    Where a talent query searches for talents
+    """
+
+    # the talent pool search API only
+    UPSTREAM = "upstream"
+    # the talents stored in our database only
+    LOCAL = "local"
+    # the stored talents first, then the talent pool results not stored yet
+    MERGE = "merge"
@@ -0,0 +1,11 @@
+import enum
+
+
+class StructuredQuerySourceEnum(enum.Enum):
+    """
+    Where the structured query of a talent query comes from
+    """
+
+    LLM = "llm"
+    CACHE = "cache"
+    RULES = "rules"
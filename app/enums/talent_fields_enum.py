@@ -0,0 +1,10 @@
+import enum
+
+
+class TalentFieldsEnum(enum.Enum):
+    """
+    Talent fields enum, the columns returned for each talent
+    """
+
+    SUMMARY = "summary"
+    FULL = "full"
@@ -0,0 +1,13 @@
+import enum
+
+
+class TalentQueryStatusEnum(enum.Enum):
+    """
+    Talent query status enum
+    """
+
+    PENDING = "pending"
+    STRUCTURING = "structuring"
+    SEARCHING = "searching"
+    DONE = "done"
+    FAILED = "failed"
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 
+from app.infrastructure import metrics
+
 router = APIRouter()
 
 
@@ -8,6 +10,11 @@ def check_health():
     return {"status": "ok"}
 
 
+@router.get("/metrics")
+def get_metrics():
+    return metrics.get_metrics()
+
+
 # @router.get("/version")
 # def get_version():
 #     return ResponseBuilder(
@@ -0,0 +1,38 @@
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters: dict[str, int] = defaultdict(int)
+_gauges: dict[str, float] = {}
+
+
+def increment(name: str, amount: int = 1):
+    """
+    Increase the counter with the given name.
+
+    Args:
+        name (str): The counter name, e.g. "structured_query_cache.miss".
+        amount (int): The amount to add.
+    """
+    with _lock:
+        _counters[name] += amount
+
+
+def set_gauge(name: str, value: float):
+    """
+    Set the gauge with the given name to the current value.
+
+    Args:
+        name (str): The gauge name.
+        value (float): The current value.
+    """
+    with _lock:
+        _gauges[name] = value
+
+
+def get_metrics() -> dict:
+    """
+    Returns a snapshot of all counters and gauges of this process.
+    """
+    with _lock:
+        return {"counters": dict(_counters), "gauges": dict(_gauges)}
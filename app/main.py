@@ -11,8 +11,20 @@ from starlette.requests import Request
 
 from app.config.logging_config import logger
 from app.config.settings import settings
+from app.controllers.talent_controller import talent_router
 from app.controllers.talent_query_controller import talent_query_router
 from app.infrastructure.apis import router as common_router
+from app.services.structure_query_service import warm_up_structured_query_model
+from app.services.talent_pool_service import (
+    close_talent_pool_client,
+    start_talent_pool_client,
+)
+from app.services.talent_prefetch_service import talent_prefetcher
+from app.services.talent_query_job_service import (
+    fail_interrupted_talent_queries_on_startup,
+    talent_query_job_runner,
+)
+from app.services.talent_refresh_service import talent_refresher
 from app.user.apis import router as user_router
 
 logging.getLogger().setLevel(logging.INFO)
@@ -54,6 +66,7 @@ app.include_router(user_router, prefix="/user", tags=["user"])
 app.include_router(
     router=talent_query_router, prefix="/talent-query", tags=["talent-query"]
 )
+app.include_router(router=talent_router, prefix="/talent", tags=["talent"])
 
 
 if settings.AUTH_METHOD == "firebase":
@@ -64,9 +77,21 @@ if settings.AUTH_METHOD == "firebase":
 @app.on_event("startup")
 async def startup_event():
     logger.critical("Application start")
+    await start_talent_pool_client()
+    await warm_up_structured_query_model()
+    await fail_interrupted_talent_queries_on_startup()
+    if settings.TALENT_STALE_REFRESH_ENABLED:
+        talent_refresher.start(
+            interval_seconds=settings.TALENT_STALE_REFRESH_INTERVAL_SECONDS,
+            batch_size=settings.TALENT_STALE_REFRESH_BATCH_SIZE,
+        )
 
 
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
     # scheduler.shutdown()
+    await talent_query_job_runner.shutdown()
+    await talent_prefetcher.shutdown()
+    await talent_refresher.shutdown()
+    await close_talent_pool_client()
     logger.critical("Application shutdown")
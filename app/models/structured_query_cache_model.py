@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.config.database import DBBase
+
+
+class StructuredQueryCache(DBBase):
+    """
+    Structured query generated by the LLM for a normalized natural language query.
+    The cache key is the hash of the normalized query and the model version.
+    """
+
+    __tablename__ = "structured_query_caches"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)
+    normalized_query = Column(Text, nullable=False)
+    model_version = Column(String(100), nullable=False)
+    structured_query = Column(JSONB, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,18 +1,64 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.config.database import DBBase
+from app.utils.payload_utils import decompress_payload
 
 
 class Talent(DBBase):
     __tablename__ = "talents"
+    __table_args__ = (
+        # trigram indexes for the ILIKE filters of the local search,
+        # they need the pg_trgm extension
+        Index(
+            "ix_talents_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_talents_location_trgm",
+            "location",
+            postgresql_using="gin",
+            postgresql_ops={"location": "gin_trgm_ops"},
+        ),
+        # containment (@>) indexes for the collection filters of the local search
+        Index(
+            "ix_talents_member_education_collection",
+            "member_education_collection",
+            postgresql_using="gin",
+            postgresql_ops={"member_education_collection": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_talents_member_experience_collection",
+            "member_experience_collection",
+            postgresql_using="gin",
+            postgresql_ops={"member_experience_collection": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_talents_member_skills_collection",
+            "member_skills_collection",
+            postgresql_using="gin",
+            postgresql_ops={"member_skills_collection": "jsonb_path_ops"},
+        ),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    core_signal_id = Column(String)
+    core_signal_id = Column(String, unique=True, index=True)
     name = Column(String)
     first_name = Column(String)
     last_name = Column(String)
@@ -40,7 +86,9 @@ class Talent(DBBase):
     canonical_hash = Column(String)
     canonical_shorthand_name = Column(String)
     canonical_shorthand_name_hash = Column(String)
-    # json fields
+    # the /collect payload as zlib compressed JSON, read only for the full details
+    raw_payload = deferred(Column(LargeBinary))
+    # json fields, new rows only fill the experience, skills and education ones
     member_also_viewed_collection = Column(JSONB)
     member_awards_collection = Column(JSONB)
     member_certifications_collection = Column(JSONB)
@@ -67,4 +115,14 @@ class Talent(DBBase):
     member_websites_collection = Column(JSONB)
     #
     created_at = Column(DateTime, default=datetime.utcnow)
+    # when the profile was last collected from the talent pool service
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # not indexed, so setting it on a view can be a HOT update that leaves the
+    # indexes of the table alone, see talent_service.flush_talent_views
+    last_viewed_at = Column(DateTime)
+
+    def get_raw_payload(self) -> dict | None:
+        if self.raw_payload is None:
+            return None
+        return decompress_payload(self.raw_payload)
 
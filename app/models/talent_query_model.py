@@ -1,11 +1,22 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, Text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.config.database import DBBase
+from app.enums.search_mode_enum import SearchModeEnum
+from app.enums.talent_query_status_enum import TalentQueryStatusEnum
 
 
 class TalentQuery(DBBase):
@@ -14,7 +25,41 @@ class TalentQuery(DBBase):
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     nature_language_query = Column(Text, nullable=False)
     structured_query = Column(JSONB, nullable=True)
-    query_result = Column(ARRAY(JSONB), nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # StructuredQuerySourceEnum, null for talent queries saved before it was recorded
+    structured_query_source = Column(String(20), nullable=True)
+    # legacy result ids, only set for talent queries saved before query_result_ids
+    query_result = deferred(Column(ARRAY(JSONB), nullable=True))
+    # result ids packed by app.utils.packed_id_utils.pack_ids, in result order
+    query_result_ids = deferred(Column(LargeBinary, nullable=True))
+    result_count = Column(Integer, nullable=True)
+    # pending -> structuring -> searching -> done / failed
+    status = Column(
+        String(20),
+        nullable=False,
+        default=TalentQueryStatusEnum.PENDING.value,
+        server_default=TalentQueryStatusEnum.DONE.value,
+    )
+    error_message = Column(Text, nullable=True)
+    search_mode = Column(
+        String(20),
+        nullable=False,
+        default=SearchModeEnum.UPSTREAM.value,
+        server_default=SearchModeEnum.UPSTREAM.value,
+    )
+    # pipeline accounting, llm tokens and cost are 0 on a structured query cache hit
+    llm_model_name = Column(String, nullable=True)
+    llm_input_tokens = Column(Integer, nullable=True)
+    llm_output_tokens = Column(Integer, nullable=True)
+    llm_cost_usd = Column(Float, nullable=True)
+    llm_latency_ms = Column(Integer, nullable=True)
+    structuring_latency_ms = Column(Integer, nullable=True)
+    search_latency_ms = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     user_id = Column(String(36), ForeignKey('users.id'), nullable=True)
     user = relationship("User", back_populates="talent_queries")
+
+    def get_result_count(self) -> int:
+        """Number of talent ids found by the query"""
+        if self.result_count is not None:
+            return self.result_count
+        return len(self.query_result or [])
@@ -1,12 +1,38 @@
+import threading
+
 from langchain_openai import ChatOpenAI
 from langchain_core.language_models.chat_models import (
     BaseChatModel,
 )
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable
 from langchain_anthropic import ChatAnthropic
 from app.config.settings import settings
 
 from app.dto.linkedin_search_params_dto import LinkedInSearchParamsDto
 
+OPENAI_MODEL_NAME = "gpt-3.5-turbo-0125"
+ANTHROPIC_MODEL_NAME = "claude-3-haiku-20240307"
+
+# USD per million (input, output) tokens
+MODEL_PRICES_PER_MILLION_TOKENS = {
+    OPENAI_MODEL_NAME: (0.5, 1.5),
+    ANTHROPIC_MODEL_NAME: (0.25, 1.25),
+}
+
+
+def get_llm_model_name(model_type="openai") -> str:
+    """
+    Returns the name of the LLM model used for the specified type.
+    """
+    if model_type == "openai":
+        return OPENAI_MODEL_NAME
+    elif model_type == "anthropic":
+        return ANTHROPIC_MODEL_NAME
+    else:
+        raise ValueError("Unsupported model type.")
+
+
 def get_llm_model(model_type="openai") -> BaseChatModel:
     """
     Returns an LLM model based on the specified type.
@@ -15,14 +41,97 @@ def get_llm_model(model_type="openai") -> BaseChatModel:
     :return: An instance of the specified LLM model.
     """
     if model_type == "openai":
-        model = ChatOpenAI(model="gpt-3.5-turbo-0125", temperature=0)
+        model = ChatOpenAI(model=OPENAI_MODEL_NAME, temperature=0)
     elif model_type == "anthropic":
         model = ChatAnthropic(
             api_key=settings.ANTHROPIC_API_KEY,
-            model="claude-3-haiku-20240307",
+            model=ANTHROPIC_MODEL_NAME,
             temperature=0,
         )
     else:
         raise ValueError("Unsupported model type.")
     
     return model
+
+
+# process-wide clients, so their HTTP connection pools are reused across queries
+_llm_models: dict[str, BaseChatModel] = {}
+_structured_llms: dict[tuple[str, str, type, bool], Runnable] = {}
+_registry_lock = threading.Lock()
+
+
+def get_shared_llm_model(model_type="openai") -> BaseChatModel:
+    """
+    Returns the LLM model of the specified type shared by the whole process.
+    """
+    with _registry_lock:
+        model = _llm_models.get(model_type)
+        if model is None:
+            model = _llm_models[model_type] = get_llm_model(model_type)
+        return model
+
+
+def get_structured_llm(
+    output_schema: type, model_type="openai", include_raw: bool = False
+) -> Runnable:
+    """
+    Returns the shared runnable that answers with an `output_schema` object,
+    or with `{"raw", "parsed", "parsing_error"}` if `include_raw` is set.
+
+    The runnable is built once per provider, model and output schema, so the
+    schema is converted to a tool definition only once.
+    """
+    key = (model_type, get_llm_model_name(model_type), output_schema, include_raw)
+    with _registry_lock:
+        structured_llm = _structured_llms.get(key)
+    if structured_llm is not None:
+        return structured_llm
+
+    structured_llm = get_shared_llm_model(model_type).with_structured_output(
+        output_schema, include_raw=include_raw
+    )
+    with _registry_lock:
+        return _structured_llms.setdefault(key, structured_llm)
+
+
+async def warm_up_llm_model(
+    output_schema: type, model_type="openai", include_raw: bool = False
+) -> None:
+    """
+    Build the shared clients and runnable ahead of the first query, and with
+    `LLM_WARM_UP_PING` send a one token request to open the connection.
+    """
+    get_structured_llm(output_schema, model_type, include_raw=include_raw)
+    if settings.LLM_WARM_UP_PING:
+        await get_shared_llm_model(model_type).bind(max_tokens=1).ainvoke("ping")
+
+
+def get_token_usage(message: AIMessage) -> tuple[int | None, int | None]:
+    """
+    Returns the input and output tokens reported for the LLM response.
+    """
+    usage_metadata = getattr(message, "usage_metadata", None)
+    if usage_metadata:
+        return usage_metadata.get("input_tokens"), usage_metadata.get("output_tokens")
+
+    # anthropic reports "usage", openai "token_usage"
+    usage = message.response_metadata.get("usage")
+    if usage:
+        return usage.get("input_tokens"), usage.get("output_tokens")
+    token_usage = message.response_metadata.get("token_usage")
+    if token_usage:
+        return token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")
+    return None, None
+
+
+def get_llm_cost(
+    model_name: str, input_tokens: int | None, output_tokens: int | None
+) -> float | None:
+    """
+    Returns the cost in USD of the tokens, or None if it is unknown.
+    """
+    prices = MODEL_PRICES_PER_MILLION_TOKENS.get(model_name)
+    if prices is None or input_tokens is None or output_tokens is None:
+        return None
+    input_price, output_price = prices
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
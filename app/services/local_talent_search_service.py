@@ -0,0 +1,112 @@
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.dto.linkedin_search_params_dto import LinkedInSearchParamsDto
+from app.models.talent_model import Talent
+
+# keys of the collection items in the talent pool /collect payload
+EXPERIENCE_COMPANY_NAME_KEY = "company_name"
+EDUCATION_INSTITUTION_NAME_KEY = "title"
+SKILL_LIST_KEY = "member_skill_list"
+SKILL_NAME_KEY = "skill"
+
+
+# escape character of the ILIKE patterns, the same one as SQLAlchemy's autoescape
+LIKE_ESCAPE = "/"
+
+
+def get_contains_pattern(value: str) -> str:
+    """
+    ILIKE pattern matching the value anywhere, with the wildcards of the value escaped.
+    """
+    escaped = (
+        value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", f"{LIKE_ESCAPE}%")
+        .replace("_", f"{LIKE_ESCAPE}_")
+    )
+    return f"%{escaped}%"
+
+
+def ilike_contains(column, value: str):
+    """
+    Case-insensitive substring filter that can use a trigram index on the column.
+    """
+    return column.ilike(get_contains_pattern(value), escape=LIKE_ESCAPE)
+
+
+def get_local_search_conditions(params: LinkedInSearchParamsDto) -> list:
+    """
+    Translate the search params to filters on the talents table.
+
+    Every filter can use an index: the title and location ILIKE filters the
+    trigram indexes, the collection filters the jsonb_path_ops GIN indexes.
+
+    Args:
+        params (LinkedInSearchParamsDto): The structured query.
+
+    Returns:
+        list: The filters, all of them must match.
+    """
+    conditions = []
+    if params.experience_title:
+        titles = params.experience_title
+        conditions.append(or_(*(ilike_contains(Talent.title, t) for t in titles)))
+    if params.country:
+        conditions.append(Talent.country.in_(params.country))
+    if params.location:
+        conditions.append(ilike_contains(Talent.location, params.location))
+    if params.experience_company_name:
+        conditions.append(
+            Talent.member_experience_collection.contains(
+                [{EXPERIENCE_COMPANY_NAME_KEY: params.experience_company_name}]
+            )
+        )
+    if params.education_institution_name:
+        conditions.append(
+            Talent.member_education_collection.contains(
+                [{EDUCATION_INSTITUTION_NAME_KEY: params.education_institution_name}]
+            )
+        )
+    if params.keyword:
+        conditions.append(
+            or_(
+                *(
+                    or_(
+                        ilike_contains(Talent.title, keyword),
+                        Talent.member_skills_collection.contains(
+                            [{SKILL_LIST_KEY: {SKILL_NAME_KEY: keyword}}]
+                        ),
+                    )
+                    for keyword in params.keyword
+                )
+            )
+        )
+    return conditions
+
+
+def search_local_talent_ids(
+    params: LinkedInSearchParamsDto, limit: int, db_session: Session
+) -> list[str]:
+    """Search the talents stored in the database, the most recently collected first.
+
+    A structured query without any filter matches nothing.
+
+    Args:
+        params (LinkedInSearchParamsDto): The structured query.
+        limit (int): The maximum number of talent ids.
+        db_session (Session): The database session.
+
+    Returns:
+        list[str]: The core_signal_ids of the matching talents.
+    """
+    conditions = get_local_search_conditions(params)
+    if not conditions:
+        return []
+
+    stmt = (
+        select(Talent.core_signal_id)
+        .where(*conditions)
+        .order_by(Talent.updated_at.desc().nulls_last())
+        .limit(limit)
+    )
+    return db_session.execute(stmt).scalars().all()
@@ -0,0 +1,296 @@
+import functools
+import re
+from typing import get_args
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.constants import (
+    COMPANIES,
+    COUNTRY_ALIASES,
+    TECHNOLOGIES,
+    TITLE_DOMAINS,
+    TITLE_ROLES,
+    TITLE_SENIORITIES,
+    CountryLiteral,
+)
+from app.dto.linkedin_search_params_dto import LinkedInSearchParamsDto
+from app.enums.structured_query_source_enum import StructuredQuerySourceEnum
+from app.infrastructure import metrics
+from app.models.talent_query_model import TalentQuery
+from app.utils.search_params_utils import canonicalize_talent_pool_query_dict
+
+TOKEN_PATTERN = re.compile(r"[\w+#.]*[\w+#]|\.\w+")
+
+COUNTRY = "country"
+COMPANY = "company"
+ROLE = "role"
+SENIORITY = "seniority"
+DOMAIN = "domain"
+TECHNOLOGY = "technology"
+FILLER = "filler"
+
+# words that do not change the search
+FILLER_WORDS = [
+    "a",
+    "an",
+    "the",
+    "in",
+    "at",
+    "from",
+    "for",
+    "with",
+    "who",
+    "that",
+    "and",
+    "or",
+    "based",
+    "located",
+    "living",
+    "working",
+    "works",
+    "work",
+    "find",
+    "search",
+    "looking",
+    "hire",
+    "hiring",
+    "need",
+    "want",
+    "me",
+    "i",
+    "we",
+    "some",
+    "someone",
+    "people",
+    "person",
+    "candidates",
+    "candidate",
+    "profiles",
+    "currently",
+    "experienced",
+    "skilled",
+]
+
+
+@functools.cache
+def get_lexicon() -> dict[tuple[str, ...], tuple[str, str]]:
+    """
+    Phrases the parser understands, as token tuples mapped to their kind and value.
+    """
+    lexicon = {}
+
+    def add(phrase: str, kind: str, value: str) -> None:
+        lexicon[tuple(tokenize(phrase))] = (kind, value)
+
+    for word in FILLER_WORDS:
+        add(word, FILLER, word)
+    for phrase in TITLE_SENIORITIES:
+        add(phrase, SENIORITY, phrase)
+    for phrase in TITLE_DOMAINS:
+        add(phrase, DOMAIN, phrase)
+    for technology in TECHNOLOGIES:
+        add(technology, TECHNOLOGY, technology)
+    for role in TITLE_ROLES:
+        add(role, ROLE, role)
+        add(f"{role}s", ROLE, role)
+    for company in COMPANIES:
+        add(company, COMPANY, company)
+    for country in get_args(CountryLiteral):
+        add(country, COUNTRY, country)
+    for alias, country in COUNTRY_ALIASES.items():
+        add(alias, COUNTRY, country)
+    return lexicon
+
+
+@functools.cache
+def get_max_phrase_length() -> int:
+    return max(len(phrase) for phrase in get_lexicon())
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercase tokens of the text, keeping skills like "c++", "c#" and "node.js" whole.
+    """
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+def match_phrases(tokens: list[str]) -> list[tuple[str, str, str]]:
+    """
+    Split the tokens into the longest known phrases.
+
+    Returns:
+        list[tuple[str, str, str]]: The kind, value and text of each phrase,
+            unknown tokens have the kind None.
+    """
+    lexicon = get_lexicon()
+    phrases = []
+    index = 0
+    while index < len(tokens):
+        for length in range(min(get_max_phrase_length(), len(tokens) - index), 0, -1):
+            phrase = tuple(tokens[index : index + length])
+            if phrase in lexicon:
+                kind, value = lexicon[phrase]
+                phrases.append((kind, value, " ".join(phrase)))
+                index += length
+                break
+        else:
+            phrases.append((None, tokens[index], tokens[index]))
+            index += 1
+    return phrases
+
+
+def parse_natural_language_query(
+    natural_language_query: str,
+) -> tuple[LinkedInSearchParamsDto, float]:
+    """Structure a simple query with the gazetteer and dictionaries, without the LLM.
+
+    A job title is a role with the seniority, domain and technology words
+    right before it, e.g. "senior python engineer". Technologies outside a
+    title are keywords. Seniority and domain words that are not followed by
+    a role, e.g. "manager in sales", are not understood.
+
+    Args:
+        natural_language_query (str): The natural language query from the user.
+
+    Returns:
+        tuple[LinkedInSearchParamsDto, float]: The structured query and the
+            confidence, the share of the meaningful words that were understood.
+            The confidence is 0 without a job title or with several companies.
+    """
+    phrases = match_phrases(tokenize(natural_language_query))
+
+    titles, countries, companies, keywords = [], [], [], []
+    # the (kind, text) of the words waiting for the role of their job title
+    modifiers = []
+    understood = meaningful = 0
+
+    # the seniority and domain words of modifiers without a role are lost, so
+    # they are taken back from the understood words
+    def drop_modifiers() -> int:
+        dropped = sum(kind in (SENIORITY, DOMAIN) for kind, _ in modifiers)
+        modifiers.clear()
+        return dropped
+
+    for kind, value, text in phrases:
+        if kind == FILLER:
+            understood -= drop_modifiers()
+            continue
+        meaningful += 1
+        if kind is None:
+            understood -= drop_modifiers()
+            continue
+        understood += 1
+
+        if kind in (SENIORITY, DOMAIN):
+            modifiers.append((kind, text))
+        elif kind == TECHNOLOGY:
+            modifiers.append((kind, text))
+            keywords.append(value)
+        elif kind == ROLE:
+            titles.append(" ".join([*(text for _, text in modifiers), value]))
+            modifiers.clear()
+        elif kind == COUNTRY:
+            countries.append(value)
+            understood -= drop_modifiers()
+        elif kind == COMPANY:
+            companies.append(value)
+            understood -= drop_modifiers()
+    understood -= drop_modifiers()
+
+    structured_query = LinkedInSearchParamsDto(
+        experience_title=list(dict.fromkeys(titles)),
+        country=list(dict.fromkeys(countries)),
+        experience_company_name=companies[0] if len(companies) == 1 else "",
+        # a technology in the title is already searched by the title
+        keyword=[
+            keyword
+            for keyword in dict.fromkeys(keywords)
+            if not any(keyword in title.split() for title in titles)
+        ],
+    )
+    if not titles or len(set(companies)) > 1 or not meaningful:
+        return structured_query, 0.0
+    return structured_query, understood / meaningful
+
+
+def get_rule_based_structured_query(
+    natural_language_query: str,
+) -> LinkedInSearchParamsDto | None:
+    """Structure the query without the LLM if the parser is confident enough.
+
+    The hit rate is tracked by the `rule_based_parser.hit` and
+    `rule_based_parser.miss` counters.
+
+    Args:
+        natural_language_query (str): The natural language query from the user.
+
+    Returns:
+        LinkedInSearchParamsDto | None: The structured query, or None to fall back to the LLM.
+    """
+    structured_query, confidence = parse_natural_language_query(natural_language_query)
+    if confidence < settings.RULE_BASED_PARSER_MIN_CONFIDENCE:
+        metrics.increment("rule_based_parser.miss")
+        return None
+    metrics.increment("rule_based_parser.hit")
+    return structured_query
+
+
+def evaluate_rule_based_parser(
+    limit: int, user_id: str, db_session: Session
+) -> dict:
+    """Compare the parser with the structured queries recorded from the LLM.
+
+    Only the talent queries of the user are compared, and the disagreements
+    hold the structured queries but not the text of the queries.
+
+    Args:
+        limit (int): The number of most recent talent queries to compare.
+        user_id (str): The user who created the talent queries.
+        db_session (Session): The database session.
+
+    Returns:
+        dict: The number of queries, how many the parser is confident about
+            (hit rate) and how many of those match the recorded structured
+            query (agreement), with a sample of the disagreements.
+    """
+    stmt = (
+        select(TalentQuery.nature_language_query, TalentQuery.structured_query)
+        .where(
+            TalentQuery.user_id == user_id,
+            TalentQuery.structured_query.is_not(None),
+            # skip the queries structured by the parser itself
+            TalentQuery.structured_query_source.is_distinct_from(
+                StructuredQuerySourceEnum.RULES.value
+            ),
+        )
+        .order_by(TalentQuery.created_at.desc())
+        .limit(limit)
+    )
+    rows = db_session.execute(stmt).all()
+
+    confident = agreed = 0
+    disagreements = []
+    for natural_language_query, recorded_query in rows:
+        structured_query, confidence = parse_natural_language_query(
+            natural_language_query
+        )
+        if confidence < settings.RULE_BASED_PARSER_MIN_CONFIDENCE:
+            continue
+        confident += 1
+        parsed = structured_query.get_canonical_query_dict()
+        expected = canonicalize_talent_pool_query_dict(recorded_query)
+        if parsed == expected:
+            agreed += 1
+        elif len(disagreements) < 20:
+            disagreements.append({"parsed": parsed, "recorded": expected})
+
+    return {
+        "queries": len(rows),
+        "confident": confident,
+        "agreed": agreed,
+        "hit_rate": confident / len(rows) if rows else None,
+        "agreement": agreed / confident if confident else None,
+        "disagreements": disagreements,
+    }
@@ -1,7 +1,29 @@
-from langchain_openai import ChatOpenAI
+import time
 
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config.settings import settings
 from app.dto.linkedin_search_params_dto import LinkedInSearchParamsDto
-from app.services.llm_model_service import get_llm_model
+from app.dto.llm_usage_dto import LLMUsageDto
+from app.enums.structured_query_source_enum import StructuredQuerySourceEnum
+from app.infrastructure.logger import log_message
+from app.services.llm_model_service import (
+    get_llm_cost,
+    get_llm_model_name,
+    get_structured_llm,
+    get_token_usage,
+    warm_up_llm_model,
+)
+from app.services.rule_based_query_parser_service import (
+    get_rule_based_structured_query,
+)
+from app.services.structured_query_cache_service import (
+    get_cached_structured_query,
+    set_cached_structured_query,
+)
+
+STRUCTURED_QUERY_MODEL_TYPE = "anthropic"
 
 
 def natural_language_to_structured_query(
@@ -9,9 +31,91 @@ def natural_language_to_structured_query(
 ) -> LinkedInSearchParamsDto:
     """Use natural language query to create a structured query"""
 
-    model :BaseChatModel= get_llm_model("anthropic")
-    structured_llm = model.with_structured_output(LinkedInSearchParamsDto)
+    structured_llm = get_structured_llm(
+        LinkedInSearchParamsDto, STRUCTURED_QUERY_MODEL_TYPE
+    )
 
     structured_result = structured_llm.invoke(natural_language_query)
 
     return structured_result
+
+
+async def natural_language_to_structured_query_async(
+    natural_language_query: str,
+) -> tuple[LinkedInSearchParamsDto, LLMUsageDto]:
+    """Use natural language query to create a structured query without blocking the event loop
+
+    Returns the structured query and the tokens, cost and latency of the LLM call.
+    """
+
+    structured_llm = get_structured_llm(
+        LinkedInSearchParamsDto, STRUCTURED_QUERY_MODEL_TYPE, include_raw=True
+    )
+
+    start = time.monotonic()
+    structured_result = await structured_llm.ainvoke(natural_language_query)
+    latency_ms = int((time.monotonic() - start) * 1000)
+
+    if structured_result["parsing_error"] is not None:
+        raise structured_result["parsing_error"]
+    if structured_result["parsed"] is None:
+        raise ValueError("The LLM did not return a structured query")
+
+    model_name = get_llm_model_name(STRUCTURED_QUERY_MODEL_TYPE)
+    input_tokens, output_tokens = get_token_usage(structured_result["raw"])
+    llm_usage = LLMUsageDto(
+        model_name=model_name,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cost_usd=get_llm_cost(model_name, input_tokens, output_tokens),
+        latency_ms=latency_ms,
+    )
+    return structured_result["parsed"], llm_usage
+
+
+async def warm_up_structured_query_model() -> None:
+    """Prepare the LLM client used for structured queries, a failure is only logged"""
+    try:
+        await warm_up_llm_model(
+            LinkedInSearchParamsDto, STRUCTURED_QUERY_MODEL_TYPE, include_raw=True
+        )
+    except Exception as e:
+        log_message(level="error", event="LLM warm up failed", error=repr(e))
+
+
+async def get_structured_query(
+    natural_language_query: str, db_session: Session
+) -> tuple[LinkedInSearchParamsDto, StructuredQuerySourceEnum, LLMUsageDto | None]:
+    """Get the structured query from the rule-based parser for simple queries,
+    then from the cache, or from the LLM on a cache miss
+
+    Returns the structured query, where it comes from, and the usage of the
+    LLM call (None if the LLM was not called).
+    """
+    if settings.RULE_BASED_PARSER_ENABLED:
+        structured_query = get_rule_based_structured_query(natural_language_query)
+        if structured_query is not None:
+            return structured_query, StructuredQuerySourceEnum.RULES, None
+
+    model_name = get_llm_model_name(STRUCTURED_QUERY_MODEL_TYPE)
+
+    structured_query = await run_in_threadpool(
+        get_cached_structured_query,
+        natural_language_query=natural_language_query,
+        model_name=model_name,
+        db_session=db_session,
+    )
+    if structured_query is not None:
+        return structured_query, StructuredQuerySourceEnum.CACHE, None
+
+    structured_query, llm_usage = await natural_language_to_structured_query_async(
+        natural_language_query=natural_language_query
+    )
+    await run_in_threadpool(
+        set_cached_structured_query,
+        natural_language_query=natural_language_query,
+        model_name=model_name,
+        structured_query=structured_query,
+        db_session=db_session,
+    )
+    return structured_query, StructuredQuerySourceEnum.LLM, llm_usage
@@ -0,0 +1,137 @@
+import functools
+import hashlib
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.dto.linkedin_search_params_dto import LinkedInSearchParamsDto
+from app.infrastructure import metrics
+from app.models.structured_query_cache_model import StructuredQueryCache
+from app.utils.lru_cache import TTLLRUCache
+
+# in-process tier, in front of the structured_query_caches table
+_structured_query_lru = TTLLRUCache(
+    max_size=settings.STRUCTURED_QUERY_CACHE_MAX_SIZE,
+    ttl_seconds=settings.STRUCTURED_QUERY_CACHE_TTL_SECONDS,
+)
+
+
+def normalize_natural_language_query(natural_language_query: str) -> str:
+    """
+    Normalize the query so that the same request written slightly differently
+    shares a cache entry: lower case, single spaces, no surrounding punctuation.
+    """
+    normalized = natural_language_query.casefold()
+    normalized = re.sub(r"\s+", " ", normalized)
+    return normalized.strip(" .,;:!?\"'")
+
+
+@functools.cache
+def get_model_version(model_name: str) -> str:
+    """
+    Returns the model version part of the cache key.
+
+    The schema of LinkedInSearchParamsDto is part of the version, so changing
+    the search params invalidates the cached structured queries.
+    """
+    schema_hash = hashlib.sha256(
+        LinkedInSearchParamsDto.schema_json().encode()
+    ).hexdigest()
+    return f"{model_name}:{schema_hash[:12]}"
+
+
+def get_cache_key(normalized_query: str, model_version: str) -> str:
+    return hashlib.sha256(f"{model_version}\n{normalized_query}".encode()).hexdigest()
+
+
+def get_cached_structured_query(
+    natural_language_query: str, model_name: str, db_session: Session
+) -> LinkedInSearchParamsDto | None:
+    """Get the cached structured query for the natural language query.
+
+    Args:
+        natural_language_query (str): The natural language query from the user.
+        model_name (str): The LLM model that structures the query.
+        db_session (Session): The database session.
+
+    Returns:
+        LinkedInSearchParamsDto | None: The structured query, or None on a cache miss.
+    """
+    normalized_query = normalize_natural_language_query(natural_language_query)
+    cache_key = get_cache_key(normalized_query, get_model_version(model_name))
+
+    structured_query_dict = _structured_query_lru.get(cache_key)
+    if structured_query_dict is not None:
+        metrics.increment("structured_query_cache.memory_hit")
+        return LinkedInSearchParamsDto.parse_obj(structured_query_dict)
+
+    cache = (
+        db_session.query(StructuredQueryCache)
+        .filter(
+            StructuredQueryCache.cache_key == cache_key,
+            StructuredQueryCache.expires_at > datetime.utcnow(),
+        )
+        .first()
+    )
+    if not cache:
+        metrics.increment("structured_query_cache.miss")
+        # end the read, the LLM call that follows must not hold the connection
+        db_session.commit()
+        return None
+
+    metrics.increment("structured_query_cache.db_hit")
+    structured_query_dict = cache.structured_query
+    ttl_seconds = (cache.expires_at - datetime.utcnow()).total_seconds()
+    _structured_query_lru.set(cache_key, structured_query_dict, ttl_seconds)
+
+    cache.hit_count = StructuredQueryCache.hit_count + 1
+    db_session.commit()
+
+    return LinkedInSearchParamsDto.parse_obj(structured_query_dict)
+
+
+def set_cached_structured_query(
+    natural_language_query: str,
+    model_name: str,
+    structured_query: LinkedInSearchParamsDto,
+    db_session: Session,
+):
+    """Cache the structured query generated for the natural language query.
+
+    Args:
+        natural_language_query (str): The natural language query from the user.
+        model_name (str): The LLM model that structured the query.
+        structured_query (LinkedInSearchParamsDto): The structured query from the LLM.
+        db_session (Session): The database session.
+    """
+    normalized_query = normalize_natural_language_query(natural_language_query)
+    model_version = get_model_version(model_name)
+    cache_key = get_cache_key(normalized_query, model_version)
+    structured_query_dict = structured_query.dict()
+    expires_at = datetime.utcnow() + timedelta(
+        seconds=settings.STRUCTURED_QUERY_CACHE_TTL_SECONDS
+    )
+
+    stmt = insert(StructuredQueryCache).values(
+        cache_key=cache_key,
+        normalized_query=normalized_query,
+        model_version=model_version,
+        structured_query=structured_query_dict,
+        hit_count=0,
+        expires_at=expires_at,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StructuredQueryCache.cache_key],
+        set_={
+            "structured_query": stmt.excluded.structured_query,
+            "hit_count": 0,
+            "expires_at": stmt.excluded.expires_at,
+        },
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+    _structured_query_lru.set(cache_key, structured_query_dict)
@@ -1,13 +1,159 @@
 import asyncio
 import logging.config
+import math
+import time
 
 import aiohttp
 import requests
+import requests.adapters
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_openai import ChatOpenAI
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
 from app.config.settings import settings
 from app.dto.linkedin_search_params_dto import LinkedInSearchParamsDto
+from app.infrastructure import metrics
+from app.utils.adaptive_concurrency_limiter import AdaptiveConcurrencyLimiter
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.latency_tracker import LatencyTracker
+from app.utils.lru_cache import TTLLRUCache
+from app.utils.retry_budget import RatioBudget, RetryBudget
+from app.utils.single_flight import SingleFlight
+
+
+class TalentPoolServiceError(Exception):
+    """The talent pool service answered with an error status"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Error: {status_code}, {message}")
+        self.status_code = status_code
+
+
+def is_talent_pool_overloaded(error: Exception) -> bool:
+    """Whether the error means the talent pool service is throttling or overloaded"""
+    if isinstance(error, TalentPoolServiceError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+# member ids found by /search/filter, keyed by the canonical search hash
+_search_result_cache = TTLLRUCache(
+    max_size=settings.SEARCH_RESULT_CACHE_MAX_SIZE,
+    ttl_seconds=settings.SEARCH_RESULT_CACHE_TTL_SECONDS,
+)
+
+# in-flight /search/filter calls keyed by search hash, /collect calls by member id
+_search_flight = SingleFlight()
+_collect_flight = SingleFlight()
+
+# parallelism of /collect calls, adapted to the latency and errors of the service
+_collect_limiter = AdaptiveConcurrencyLimiter(
+    name="talent_pool.collect",
+    initial_limit=settings.TALENT_POOL_COLLECT_CONCURRENCY_INITIAL,
+    min_limit=settings.TALENT_POOL_COLLECT_CONCURRENCY_MIN,
+    max_limit=settings.TALENT_POOL_COLLECT_CONCURRENCY_MAX,
+    latency_target_seconds=settings.TALENT_POOL_COLLECT_LATENCY_TARGET_SECONDS,
+    is_overload=is_talent_pool_overloaded,
+)
+# recent /collect latencies, the hedge delay is a percentile of them
+_collect_latency = LatencyTracker()
+# hedged /collect calls, as a share of all /collect calls
+_collect_hedge_budget = RatioBudget(ratio=settings.TALENT_POOL_HEDGE_BUDGET_RATIO)
+# fail fast while the talent pool service is down
+_talent_pool_breaker = CircuitBreaker(
+    name="talent_pool",
+    failure_threshold=settings.TALENT_POOL_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout_seconds=settings.TALENT_POOL_CIRCUIT_RESET_SECONDS,
+    is_failure=is_talent_pool_overloaded,
+)
+
+# app-lifetime clients, so connections are kept alive and reused across calls
+_session: aiohttp.ClientSession | None = None
+_sync_session = requests.Session()
+_sync_session.headers.update(
+    {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {settings.TALENT_POOL_TOKEN}",
+    }
+)
+_sync_session.mount(
+    "http://",
+    requests.adapters.HTTPAdapter(pool_maxsize=settings.TALENT_POOL_MAX_CONNECTIONS),
+)
+_sync_session.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(pool_maxsize=settings.TALENT_POOL_MAX_CONNECTIONS),
+)
+_sync_timeout = (
+    settings.TALENT_POOL_CONNECT_TIMEOUT_SECONDS,
+    settings.TALENT_POOL_TIMEOUT_SECONDS,
+)
+
+
+async def start_talent_pool_client():
+    """Create the pooled HTTP client shared by all talent pool calls"""
+    global _session
+    if _session is not None and not _session.closed:
+        return
+
+    connector = aiohttp.TCPConnector(
+        limit=settings.TALENT_POOL_MAX_CONNECTIONS,
+        keepalive_timeout=settings.TALENT_POOL_KEEPALIVE_SECONDS,
+        ttl_dns_cache=settings.TALENT_POOL_DNS_CACHE_SECONDS,
+    )
+    _session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(
+            total=settings.TALENT_POOL_TIMEOUT_SECONDS,
+            connect=settings.TALENT_POOL_CONNECT_TIMEOUT_SECONDS,
+        ),
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {settings.TALENT_POOL_TOKEN}",
+        },
+    )
+
+
+async def close_talent_pool_client():
+    """Close the pooled HTTP client and its connections"""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+    _sync_session.close()
+
+
+async def get_talent_pool_session() -> aiohttp.ClientSession:
+    """Get the pooled HTTP client, creating it if the app did not start it"""
+    if _session is None or _session.closed:
+        await start_talent_pool_client()
+    return _session
+
+
+def get_cached_member_ids(search_hash: str) -> list[str] | None:
+    """Get the cached member ids of a search, or None on a cache miss"""
+    member_ids = _search_result_cache.get(search_hash)
+    if member_ids is None:
+        metrics.increment("search_result_cache.miss")
+        return None
+    metrics.increment("search_result_cache.hit")
+    return list(member_ids)
+
+
+def invalidate_search_result_cache(search_hash: str | None = None):
+    """
+    Drop the cached member ids of one search, or of all searches if no hash is given.
+    """
+    if search_hash is None:
+        _search_result_cache.clear()
+    else:
+        _search_result_cache.delete(search_hash)
 
 
 def get_linkedin_member_ids_sync(params: LinkedInSearchParamsDto) -> list[str]:
@@ -15,23 +161,25 @@ def get_linkedin_member_ids_sync(params: LinkedInSearchParamsDto) -> list[str]:
     logging.info(
         f"start get_linkedin_member_ids_sync params: {params.get_talent_pool_query_dict()}"
     )
+    search_hash = params.get_search_hash()
+    member_ids = get_cached_member_ids(search_hash)
+    if member_ids is not None:
+        return member_ids
+
     api_url = f"{settings.TALENT_POOL_URL}/search/filter"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {settings.TALENT_POOL_TOKEN}",
-    }
-    response = requests.post(
+    response = _sync_session.post(
         api_url,
-        headers=headers,
         json=params.get_talent_pool_query_dict(),
+        timeout=_sync_timeout,
     )
     if response.status_code == 200:
-        logging.info(f"get response success: {response.json()}")
-
         response_json = response.json()
+        logging.info(f"get response success: {len(response_json)} members")
 
         # translate list[int] to list[str]
-        return [str(member_id) for member_id in response_json]
+        member_ids = [str(member_id) for member_id in response_json]
+        _search_result_cache.set(search_hash, tuple(member_ids))
+        return member_ids
     else:
         logging.error(f"get response failed: {response.status_code}, {response.text}")
         raise Exception(
@@ -41,12 +189,8 @@ def get_linkedin_member_ids_sync(params: LinkedInSearchParamsDto) -> list[str]:
 
 def get_linkedin_member_details_sync(member_id: str) -> dict:
     url = f"{settings.TALENT_POOL_URL}/collect/{member_id}"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {settings.TALENT_POOL_TOKEN}",
-    }
 
-    response = requests.get(url, headers=headers)
+    response = _sync_session.get(url, timeout=_sync_timeout)
 
     if response.status_code == 200:
         return response.json()
@@ -56,34 +200,174 @@ def get_linkedin_member_details_sync(member_id: str) -> dict:
 
 
 async def get_linkedin_member_ids(params: LinkedInSearchParamsDto) -> list[str]:
-    """Search LinkedIn members"""
+    """
+    Search LinkedIn members, the result is cached by the canonical search hash.
+    Concurrent identical searches share one call to the talent pool service.
+    """
+    search_hash = params.get_search_hash()
+    member_ids = get_cached_member_ids(search_hash)
+    if member_ids is not None:
+        return member_ids
+
+    if _search_flight.in_flight(search_hash):
+        metrics.increment("talent_pool.search.coalesced")
+    member_ids = await _search_flight.do(
+        search_hash,
+        lambda: _talent_pool_breaker.call(
+            lambda: _search_linkedin_member_ids(params, search_hash)
+        ),
+    )
+    return list(member_ids)
+
+
+async def _search_linkedin_member_ids(
+    params: LinkedInSearchParamsDto, search_hash: str
+) -> list[str]:
     api_url = f"{settings.TALENT_POOL_URL}/search/filter"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {settings.TALENT_POOL_TOKEN}",
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            api_url, headers=headers, json=params.dict()
-        ) as response:
-            if response.status == 200:
-                response_json = await response.json()
-                return [str(member_id) for member_id in response_json]
-            else:
-                raise Exception("Failed to fetch data")
+    session = await get_talent_pool_session()
+    async with session.post(
+        api_url, json=params.get_talent_pool_query_dict()
+    ) as response:
+        if response.status == 200:
+            response_json = await response.json()
+            logging.info(f"get response success: {len(response_json)} members")
+
+            # translate list[int] to list[str]
+            member_ids = [str(member_id) for member_id in response_json]
+            _search_result_cache.set(search_hash, tuple(member_ids))
+            return member_ids
+        else:
+            response_text = await response.text()
+            logging.error(f"get response failed: {response.status}, {response_text}")
+            # a typed error, so the circuit breaker counts 429 and 5xx as failures
+            raise TalentPoolServiceError(response.status, response_text)
+
+
+def is_talent_pool_available() -> bool:
+    """Whether calls to the talent pool service are let through the circuit breaker"""
+    return not _talent_pool_breaker.is_open()
+
+
+def new_collect_retry_budget(member_count: int) -> RetryBudget:
+    """Retry budget shared by the /collect calls of one request"""
+    return RetryBudget(
+        max_retries=math.ceil(member_count * settings.TALENT_POOL_RETRY_BUDGET_RATIO)
+    )
 
 
 async def get_linkedin_member_details_async(
-    member_id: str, session: aiohttp.ClientSession
+    member_id: str, retry_budget: RetryBudget | None = None
 ) -> dict:
+    """
+    Collect the LinkedIn member details.
+
+    Concurrent requests for the same member share one call to the talent pool
+    service. Overload errors are retried with jittered exponential backoff
+    while `retry_budget` allows, and a call slower than the usual latency is
+    hedged with a duplicate call. The latency of a call is counted from when
+    it gets a concurrency limiter slot, and a call is only hedged if the
+    limiter has a free slot and the hedge budget allows.
+    """
+    if retry_budget is None:
+        retry_budget = new_collect_retry_budget(member_count=1)
+
+    if _collect_flight.in_flight(member_id):
+        metrics.increment("talent_pool.collect.coalesced")
+    return await _collect_flight.do(
+        member_id, lambda: _collect_with_retry(member_id, retry_budget)
+    )
+
+
+async def _collect_with_retry(member_id: str, retry_budget: RetryBudget) -> dict:
+    def budget_exhausted(retry_state: RetryCallState) -> bool:
+        if retry_budget.spend():
+            metrics.increment("talent_pool.collect.retried")
+            return False
+        return True
+
+    async for attempt in AsyncRetrying(
+        retry=retry_if_exception(is_talent_pool_overloaded),
+        stop=stop_after_attempt(settings.TALENT_POOL_RETRY_ATTEMPTS) | budget_exhausted,
+        wait=wait_random_exponential(
+            multiplier=0.2, max=settings.TALENT_POOL_RETRY_MAX_WAIT_SECONDS
+        ),
+        reraise=True,
+    ):
+        with attempt:
+            return await _collect_with_hedge(member_id)
+
+
+async def _collect_with_hedge(member_id: str) -> dict:
+    _collect_hedge_budget.deposit()
+    started = asyncio.Event()
+    primary = asyncio.ensure_future(_collect_limited(member_id, started))
+    try:
+        # the hedge delay is compared with the HTTP latency, so the time
+        # spent waiting for a limiter slot does not count
+        wait_started = asyncio.ensure_future(started.wait())
+        try:
+            await asyncio.wait(
+                {primary, wait_started}, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            wait_started.cancel()
+
+        hedge_delay = (
+            _collect_latency.percentile(settings.TALENT_POOL_HEDGE_PERCENTILE)
+            or settings.TALENT_POOL_TIMEOUT_SECONDS
+        )
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        # a hedge would only queue behind the throttled calls
+        if not _collect_limiter.has_capacity() or not _collect_hedge_budget.spend():
+            metrics.increment("talent_pool.collect.hedge_skipped")
+            return await primary
+    except BaseException:
+        primary.cancel()
+        raise
+
+    metrics.increment("talent_pool.collect.hedged")
+    pending = {primary, asyncio.ensure_future(_collect_limited(member_id))}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _collect_limited(
+    member_id: str, started: asyncio.Event | None = None
+) -> dict:
+    async def collect() -> dict:
+        # the call holds a limiter slot from here
+        if started is not None:
+            started.set()
+        return await _collect_linkedin_member_details(member_id)
+
+    return await _talent_pool_breaker.call(lambda: _collect_limiter.run(collect))
+
+
+async def _collect_linkedin_member_details(member_id: str) -> dict:
     url = f"{settings.TALENT_POOL_URL}/collect/{member_id}"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {settings.TALENT_POOL_TOKEN}",
-    }
+    session = await get_talent_pool_session()
 
-    async with session.get(url, headers=headers) as response:
+    start = time.monotonic()
+    async with session.get(url) as response:
         if response.status == 200:
-            return await response.json()
+            talent_detail_json = await response.json()
+            _collect_latency.record(time.monotonic() - start)
+            return talent_detail_json
         else:
-            raise Exception(f"Error: {response.status}, {response.text}")
+            response_text = await response.text()
+            raise TalentPoolServiceError(response.status, response_text)
@@ -0,0 +1,118 @@
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.infrastructure import metrics
+from app.infrastructure.logger import log_message
+from app.services.talent_pool_service import (
+    get_linkedin_member_details_async,
+    new_collect_retry_budget,
+)
+from app.services.talent_service import get_talent_versions_in_db, upsert_talents
+
+
+class TalentPrefetcher:
+    """
+    Collect and store the talents of the next result page in the background.
+
+    All prefetches share a budget of `max_concurrency` talent pool calls.
+    Each user has at most one prefetch: a new one cancels the previous one,
+    and a prefetch is cancelled after `timeout_seconds`.
+    """
+
+    def __init__(self, max_concurrency: int, timeout_seconds: float):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._timeout_seconds = timeout_seconds
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def schedule(self, user_id: str, talent_ids: list[str]) -> None:
+        """Prefetch the talents for the user, replacing the user's previous prefetch"""
+        self.cancel(user_id)
+        if not talent_ids:
+            return
+
+        task = asyncio.create_task(self._prefetch(talent_ids))
+        self._tasks[user_id] = task
+        task.add_done_callback(lambda done: self._forget(user_id, done))
+
+    def cancel(self, user_id: str) -> None:
+        """Cancel the running prefetch of the user"""
+        task = self._tasks.pop(user_id, None)
+        if task:
+            task.cancel()
+
+    def _forget(self, user_id: str, task: asyncio.Task) -> None:
+        if self._tasks.get(user_id) is task:
+            del self._tasks[user_id]
+
+    async def _prefetch(self, talent_ids: list[str]) -> None:
+        db_session = SessionLocal()
+        try:
+            await asyncio.wait_for(
+                self._collect(talent_ids, db_session), self._timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            log_message(
+                level="info", event="Talent prefetch timed out", talent_ids=talent_ids
+            )
+        finally:
+            db_session.close()
+
+    async def _collect(self, talent_ids: list[str], db_session) -> None:
+        # only the ids are needed, not the payloads and collections
+        talents_in_db = await run_in_threadpool(
+            get_talent_versions_in_db, talent_ids=talent_ids, db_session=db_session
+        )
+        talent_ids_in_db = {talent.core_signal_id for talent in talents_in_db}
+        talent_ids_not_in_db = [
+            talent_id for talent_id in talent_ids if talent_id not in talent_ids_in_db
+        ]
+        if not talent_ids_not_in_db:
+            return
+
+        retry_budget = new_collect_retry_budget(member_count=len(talent_ids_not_in_db))
+
+        async def collect(talent_id: str) -> dict:
+            async with self._semaphore:
+                return await get_linkedin_member_details_async(
+                    talent_id, retry_budget=retry_budget
+                )
+
+        talent_details_json = await asyncio.gather(
+            *[collect(talent_id) for talent_id in talent_ids_not_in_db],
+            return_exceptions=True,
+        )
+
+        collected = []
+        for talent_id, talent_detail_json in zip(
+            talent_ids_not_in_db, talent_details_json
+        ):
+            if isinstance(talent_detail_json, Exception):
+                log_message(
+                    level="error",
+                    event="Failed to prefetch talent",
+                    talent_id=talent_id,
+                    error=repr(talent_detail_json),
+                )
+                continue
+            collected.append(talent_detail_json)
+
+        stored_talents = await run_in_threadpool(
+            upsert_talents, talent_details_json=collected, db_session=db_session
+        )
+        metrics.increment("talent_prefetch.stored", len(stored_talents))
+
+    async def shutdown(self) -> None:
+        """Cancel all running prefetches"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+talent_prefetcher = TalentPrefetcher(
+    max_concurrency=settings.TALENT_PREFETCH_CONCURRENCY,
+    timeout_seconds=settings.TALENT_PREFETCH_TIMEOUT_SECONDS,
+)
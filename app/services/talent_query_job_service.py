@@ -0,0 +1,162 @@
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.enums.talent_query_status_enum import TalentQueryStatusEnum
+from app.infrastructure.logger import log_message
+from app.models.talent_query_model import TalentQuery
+from app.services.talent_query_service import (
+    fail_interrupted_talent_queries,
+    get_talent_query,
+    run_talent_query,
+)
+
+
+async def run_talent_query_by_id(
+    talent_query_id: str, llm_semaphore: asyncio.Semaphore | None = None
+) -> TalentQuery:
+    """Run a pending talent query in its own database session"""
+    # the request session can not be shared by concurrent queries, and the
+    # talent query stays readable after the commits once the session is closed
+    db_session = SessionLocal(expire_on_commit=False)
+    try:
+        talent_query = await run_in_threadpool(
+            get_talent_query, query_id=talent_query_id, db_session=db_session
+        )
+        return await run_talent_query(
+            talent_query=talent_query,
+            db_session=db_session,
+            llm_semaphore=llm_semaphore,
+        )
+    finally:
+        db_session.close()
+
+
+async def fail_interrupted_talent_queries_on_startup() -> int:
+    """
+    Fail the talent queries that were running when the application stopped,
+    so their status pollers see them finish.
+    """
+    db_session = SessionLocal()
+    try:
+        failed = await run_in_threadpool(
+            fail_interrupted_talent_queries,
+            older_than_seconds=settings.TALENT_QUERY_INTERRUPTED_AFTER_SECONDS,
+            db_session=db_session,
+        )
+    finally:
+        db_session.close()
+    if failed:
+        log_message(
+            level="info", event="Failed interrupted talent queries", failed=failed
+        )
+    return failed
+
+
+async def run_talent_query_batch(
+    talent_query_ids: list[str], max_running: int, max_llm_concurrency: int
+) -> list[dict]:
+    """Run pending talent queries at the same time.
+
+    At most `max_running` queries run at the same time, each with its own
+    database session, so a batch can not take every pooled connection. Of
+    those, at most `max_llm_concurrency` are structured by the LLM at once.
+
+    Args:
+        talent_query_ids (list[str]): The pending talent query ids.
+        max_running (int): The maximum number of queries running at once.
+        max_llm_concurrency (int): The maximum number of concurrent LLM calls.
+
+    Returns:
+        list[dict]: The id, status, number of results and error of each talent
+            query, in the order of `talent_query_ids`.
+    """
+    query_semaphore = asyncio.Semaphore(max_running)
+    llm_semaphore = asyncio.Semaphore(max_llm_concurrency)
+
+    async def run(talent_query_id: str) -> TalentQuery:
+        # the session is only opened once the query may run
+        async with query_semaphore:
+            return await run_talent_query_by_id(
+                talent_query_id, llm_semaphore=llm_semaphore
+            )
+
+    results = await asyncio.gather(
+        *[run(talent_query_id) for talent_query_id in talent_query_ids],
+        return_exceptions=True,
+    )
+
+    items = []
+    for talent_query_id, result in zip(talent_query_ids, results):
+        if isinstance(result, Exception):
+            # the failure is already saved on the talent query
+            items.append(
+                {
+                    "talent_query_id": talent_query_id,
+                    "status": TalentQueryStatusEnum.FAILED.value,
+                    "total": 0,
+                    "error": str(result),
+                }
+            )
+            continue
+        items.append(
+            {
+                "talent_query_id": talent_query_id,
+                "status": result.status,
+                "total": result.get_result_count(),
+                "error": None,
+            }
+        )
+    return items
+
+
+class TalentQueryJobRunner:
+    """
+    Run talent queries in the background with a bounded number of workers.
+
+    At most `max_workers` queries talk to the LLM and the talent pool at the
+    same time, and at most `max_pending` queries are accepted (running or
+    waiting for a worker).
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._max_pending = max_pending
+        self._tasks: set[asyncio.Task] = set()
+
+    def is_full(self) -> bool:
+        """Whether the runner can not accept another job"""
+        return len(self._tasks) >= self._max_pending
+
+    def submit(self, talent_query_id: str) -> None:
+        """Schedule a pending talent query to run in the background"""
+        task = asyncio.create_task(self._run(talent_query_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, talent_query_id: str) -> None:
+        async with self._semaphore:
+            try:
+                await run_talent_query_by_id(talent_query_id)
+            except Exception as e:
+                # the failure is already saved on the talent query
+                log_message(
+                    level="error",
+                    event="Background talent query failed",
+                    talent_query_id=talent_query_id,
+                    error=repr(e),
+                )
+
+    async def shutdown(self) -> None:
+        """Cancel the jobs that are still running, their talent queries are failed"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+talent_query_job_runner = TalentQueryJobRunner(
+    max_workers=settings.TALENT_QUERY_JOB_WORKERS,
+    max_pending=settings.TALENT_QUERY_JOB_MAX_PENDING,
+)
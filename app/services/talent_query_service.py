@@ -0,0 +1,598 @@
+import asyncio
+import contextlib
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import SessionLocal
+from app.dto.linkedin_search_params_dto import LinkedInSearchParamsDto
+from app.dto.llm_usage_dto import LLMUsageDto
+from app.config.settings import settings
+from app.enums.search_mode_enum import SearchModeEnum
+from app.enums.structured_query_source_enum import StructuredQuerySourceEnum
+from app.enums.talent_query_status_enum import TalentQueryStatusEnum
+from app.infrastructure import metrics
+from app.infrastructure.logger import log_message
+from app.models.talent_query_model import TalentQuery
+from app.services.local_talent_search_service import search_local_talent_ids
+from app.services.rule_based_query_parser_service import parse_natural_language_query
+from app.services.structure_query_service import get_structured_query
+from app.services.talent_pool_service import get_linkedin_member_ids
+from app.services.talent_rerank_service import rerank_talent_ids
+from app.utils.packed_id_utils import PACKED_ID_SIZE, pack_ids, unpack_ids
+
+
+def create_talent_query(
+    nature_language_query: str,
+    user_id: str,
+    db_session: Session,
+    search_mode: SearchModeEnum = SearchModeEnum.UPSTREAM,
+) -> TalentQuery:
+    """Save a new pending talent query.
+
+    Args:
+        nature_language_query (str): The natural language query from the user.
+        user_id (str): The user who created the talent query.
+        db_session (Session): The database session.
+        search_mode (SearchModeEnum): Where to search for talents.
+
+    Returns:
+        TalentQuery: The saved talent query.
+    """
+    talent_query = TalentQuery(
+        nature_language_query=nature_language_query,
+        status=TalentQueryStatusEnum.PENDING.value,
+        search_mode=search_mode.value,
+        user_id=user_id,
+    )
+    db_session.add(talent_query)
+    db_session.commit()
+    db_session.refresh(talent_query)
+    return talent_query
+
+
+def create_talent_queries(
+    nature_language_queries: list[str],
+    user_id: str,
+    db_session: Session,
+    search_mode: SearchModeEnum = SearchModeEnum.UPSTREAM,
+) -> list[str]:
+    """Save new pending talent queries in one transaction.
+
+    Args:
+        nature_language_queries (list[str]): The natural language queries from the user.
+        user_id (str): The user who created the talent queries.
+        db_session (Session): The database session.
+        search_mode (SearchModeEnum): Where to search for talents.
+
+    Returns:
+        list[str]: The ids of the saved talent queries, in the order of the queries.
+    """
+    talent_queries = [
+        TalentQuery(
+            nature_language_query=nature_language_query,
+            status=TalentQueryStatusEnum.PENDING.value,
+            search_mode=search_mode.value,
+            user_id=user_id,
+        )
+        for nature_language_query in nature_language_queries
+    ]
+    db_session.add_all(talent_queries)
+    db_session.flush()
+    talent_query_ids = [talent_query.id for talent_query in talent_queries]
+    db_session.commit()
+    return talent_query_ids
+
+
+def get_talent_query(query_id: str, db_session: Session) -> TalentQuery | None:
+    """Get a talent query by id.
+
+    Args:
+        query_id (str): The talent query id.
+        db_session (Session): The database session.
+
+    Returns:
+        TalentQuery | None: The talent query, or None if it does not exist.
+    """
+    return db_session.query(TalentQuery).filter(TalentQuery.id == query_id).first()
+
+
+def get_talent_query_result_ids(
+    query_id: str, offset: int, limit: int, db_session: Session
+) -> list[str] | None:
+    """Get a slice of the result ids of a talent query.
+
+    Only the requested slice is read from the database.
+
+    Args:
+        query_id (str): The talent query id.
+        offset (int): The index of the first result id.
+        limit (int): The maximum number of result ids.
+        db_session (Session): The database session.
+
+    Returns:
+        list[str] | None: The result ids, or None if the talent query does not exist.
+    """
+    stmt = select(
+        func.substring(
+            TalentQuery.query_result_ids,
+            offset * PACKED_ID_SIZE + 1,
+            limit * PACKED_ID_SIZE,
+        ),
+        # postgres arrays are 1-based and the slice bounds are inclusive
+        TalentQuery.query_result[offset + 1 : offset + limit],
+    ).where(TalentQuery.id == query_id)
+    row = db_session.execute(stmt).first()
+    if row is None:
+        return None
+
+    packed_ids, legacy_ids = row
+    if packed_ids is not None:
+        return unpack_ids(packed_ids)
+    return [str(talent_id) for talent_id in legacy_ids or []]
+
+
+def update_talent_query_status(
+    talent_query: TalentQuery,
+    status: TalentQueryStatusEnum,
+    db_session: Session,
+    error_message: str | None = None,
+) -> TalentQuery:
+    """Move the talent query to another status.
+
+    Args:
+        talent_query (TalentQuery): The talent query to update.
+        status (TalentQueryStatusEnum): The new status.
+        db_session (Session): The database session.
+        error_message (str | None): The failure reason, only for failed queries.
+
+    Returns:
+        TalentQuery: The updated talent query.
+    """
+    talent_query.status = status.value
+    talent_query.error_message = error_message
+    db_session.commit()
+    return talent_query
+
+
+def save_structured_query(
+    talent_query: TalentQuery,
+    structured_query: LinkedInSearchParamsDto,
+    db_session: Session,
+    source: StructuredQuerySourceEnum | None = None,
+    llm_usage: LLMUsageDto | None = None,
+    structuring_latency_ms: int | None = None,
+) -> TalentQuery:
+    """Save the structured query and start searching.
+
+    Args:
+        talent_query (TalentQuery): The talent query to update.
+        structured_query (LinkedInSearchParamsDto): The structured query from the LLM.
+        db_session (Session): The database session.
+        source (StructuredQuerySourceEnum | None): Where the structured query comes from.
+        llm_usage (LLMUsageDto | None): The LLM call, None if no LLM was called.
+        structuring_latency_ms (int | None): The time spent structuring the query.
+
+    Returns:
+        TalentQuery: The updated talent query.
+    """
+    talent_query.structured_query = structured_query.get_talent_pool_query_dict()
+    talent_query.structured_query_source = source.value if source else None
+    talent_query.structuring_latency_ms = structuring_latency_ms
+    if llm_usage is not None:
+        talent_query.llm_model_name = llm_usage.model_name
+        talent_query.llm_input_tokens = llm_usage.input_tokens
+        talent_query.llm_output_tokens = llm_usage.output_tokens
+        talent_query.llm_cost_usd = llm_usage.cost_usd
+        talent_query.llm_latency_ms = llm_usage.latency_ms
+    else:
+        talent_query.llm_input_tokens = 0
+        talent_query.llm_output_tokens = 0
+        talent_query.llm_cost_usd = 0
+    talent_query.status = TalentQueryStatusEnum.SEARCHING.value
+    db_session.commit()
+    return talent_query
+
+
+def save_talent_query_result(
+    talent_query: TalentQuery,
+    talent_ids: list[str],
+    db_session: Session,
+    search_latency_ms: int | None = None,
+) -> TalentQuery:
+    """Save the talent ids found by the talent pool service.
+
+    Args:
+        talent_query (TalentQuery): The talent query to update.
+        talent_ids (list[str]): The talent ids found by the search.
+        db_session (Session): The database session.
+        search_latency_ms (int | None): The time spent searching and ranking.
+
+    Returns:
+        TalentQuery: The updated talent query.
+    """
+    talent_query.query_result_ids = pack_ids(talent_ids)
+    talent_query.result_count = len(talent_ids)
+    talent_query.search_latency_ms = search_latency_ms
+    talent_query.status = TalentQueryStatusEnum.DONE.value
+    db_session.commit()
+    return talent_query
+
+
+def fail_interrupted_talent_queries(older_than_seconds: int, db_session: Session) -> int:
+    """Fail the unfinished talent queries left behind by a restart.
+
+    Only talent queries older than `older_than_seconds` are failed, so the
+    queries still running on another worker are not touched.
+
+    Args:
+        older_than_seconds (int): The age after which an unfinished query is interrupted.
+        db_session (Session): The database session.
+
+    Returns:
+        int: The number of failed talent queries.
+    """
+    stmt = (
+        update(TalentQuery)
+        .where(
+            TalentQuery.status.in_(
+                [
+                    TalentQueryStatusEnum.PENDING.value,
+                    TalentQueryStatusEnum.STRUCTURING.value,
+                    TalentQueryStatusEnum.SEARCHING.value,
+                ]
+            ),
+            TalentQuery.created_at
+            < datetime.utcnow() - timedelta(seconds=older_than_seconds),
+        )
+        .values(
+            status=TalentQueryStatusEnum.FAILED.value,
+            error_message="Interrupted by a restart",
+        )
+    )
+    result = db_session.execute(stmt)
+    db_session.commit()
+    return result.rowcount
+
+
+def get_talent_query_stats(user_id: str, days: int, db_session: Session) -> list[dict]:
+    """Get the latency, token and cost statistics of the user's talent queries per day.
+
+    Args:
+        user_id (str): The user who created the talent queries.
+        days (int): The number of days to look back.
+        db_session (Session): The database session.
+
+    Returns:
+        list[dict]: One row per day with queries, the oldest day first.
+    """
+
+    def percentile(fraction: float, column):
+        return func.percentile_cont(fraction).within_group(column)
+
+    day = func.date_trunc("day", TalentQuery.created_at).label("day")
+    stmt = (
+        select(
+            day,
+            func.count().label("queries"),
+            func.count()
+            .filter(TalentQuery.status == TalentQueryStatusEnum.FAILED.value)
+            .label("failed"),
+            percentile(0.5, TalentQuery.structuring_latency_ms).label(
+                "structuring_latency_ms_p50"
+            ),
+            percentile(0.95, TalentQuery.structuring_latency_ms).label(
+                "structuring_latency_ms_p95"
+            ),
+            percentile(0.5, TalentQuery.llm_latency_ms).label("llm_latency_ms_p50"),
+            percentile(0.95, TalentQuery.llm_latency_ms).label("llm_latency_ms_p95"),
+            percentile(0.5, TalentQuery.search_latency_ms).label(
+                "search_latency_ms_p50"
+            ),
+            percentile(0.95, TalentQuery.search_latency_ms).label(
+                "search_latency_ms_p95"
+            ),
+            func.sum(TalentQuery.llm_input_tokens).label("llm_input_tokens"),
+            func.sum(TalentQuery.llm_output_tokens).label("llm_output_tokens"),
+            func.sum(TalentQuery.llm_cost_usd).label("llm_cost_usd"),
+            func.avg(TalentQuery.result_count).label("result_count_avg"),
+        )
+        .where(
+            TalentQuery.user_id == user_id,
+            TalentQuery.created_at >= datetime.utcnow() - timedelta(days=days),
+        )
+        .group_by(day)
+        .order_by(day)
+    )
+    return [dict(row._mapping) for row in db_session.execute(stmt)]
+
+
+def search_local_talent_ids_in_new_session(
+    params: LinkedInSearchParamsDto, limit: int
+) -> list[str]:
+    """
+    Search the stored talents in a session of their own, so the connection is
+    returned to the pool at once and not held while the talent pool is
+    searched. The session is closed by the same thread even if the awaiting
+    task is cancelled.
+    """
+    db_session = SessionLocal()
+    try:
+        return search_local_talent_ids(
+            params=params, limit=limit, db_session=db_session
+        )
+    finally:
+        db_session.close()
+
+
+async def search_talent_ids(
+    structured_query: LinkedInSearchParamsDto,
+    search_mode: SearchModeEnum,
+) -> list[str]:
+    """Search the talents in the talent pool, the stored talents, or both.
+
+    With `SearchModeEnum.MERGE` both searches run at the same time, and the
+    stored talents come first since they are served without a /collect call.
+
+    Args:
+        structured_query (LinkedInSearchParamsDto): The structured query.
+        search_mode (SearchModeEnum): Where to search for talents.
+
+    Returns:
+        list[str]: The talent ids, without duplicates.
+    """
+    if search_mode == SearchModeEnum.UPSTREAM:
+        return await get_linkedin_member_ids(params=structured_query)
+
+    local_search = run_in_threadpool(
+        search_local_talent_ids_in_new_session,
+        params=structured_query,
+        limit=settings.TALENT_LOCAL_SEARCH_LIMIT,
+    )
+    if search_mode == SearchModeEnum.LOCAL:
+        local_talent_ids = await local_search
+        metrics.increment("local_search.results", len(local_talent_ids))
+        return local_talent_ids
+
+    local_talent_ids, upstream_talent_ids = await asyncio.gather(
+        local_search, get_linkedin_member_ids(params=structured_query)
+    )
+    metrics.increment("local_search.results", len(local_talent_ids))
+    return list(dict.fromkeys([*local_talent_ids, *upstream_talent_ids]))
+
+
+def start_speculative_search(
+    natural_language_query: str, search_mode: SearchModeEnum
+) -> tuple[LinkedInSearchParamsDto, asyncio.Task] | None:
+    """Start a search from the rule-based parse while the LLM structures the query.
+
+    Nothing is started if the parser is too unsure of the query, or sure
+    enough to structure it without the LLM, since then there is no LLM
+    latency to hide.
+
+    Args:
+        natural_language_query (str): The natural language query from the user.
+        search_mode (SearchModeEnum): Where to search for talents.
+
+    Returns:
+        tuple[LinkedInSearchParamsDto, asyncio.Task] | None: The speculative
+            structured query and its search, or None.
+    """
+    if not settings.SPECULATIVE_SEARCH_ENABLED:
+        return None
+
+    speculative_query, confidence = parse_natural_language_query(
+        natural_language_query
+    )
+    if confidence < settings.SPECULATIVE_SEARCH_MIN_CONFIDENCE or (
+        settings.RULE_BASED_PARSER_ENABLED
+        and confidence >= settings.RULE_BASED_PARSER_MIN_CONFIDENCE
+    ):
+        return None
+
+    metrics.increment("speculative_search.started")
+    task = asyncio.create_task(
+        search_talent_ids(
+            structured_query=speculative_query,
+            search_mode=search_mode,
+        )
+    )
+    return speculative_query, task
+
+
+async def cancel_speculative_search(
+    speculative_search: tuple[LinkedInSearchParamsDto, asyncio.Task] | None,
+) -> None:
+    """
+    Cancel the speculative search if it is still running.
+
+    A talent pool search that is already in flight keeps running and fills
+    the search result cache, only the waiting is cancelled.
+    """
+    if speculative_search is None:
+        return
+    _, task = speculative_search
+    if not task.done():
+        task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def get_talent_ids_with_speculation(
+    structured_query: LinkedInSearchParamsDto,
+    speculative_search: tuple[LinkedInSearchParamsDto, asyncio.Task] | None,
+    search_mode: SearchModeEnum,
+) -> list[str]:
+    """Use the speculative search if it searched the same thing, or search again.
+
+    The queries are compared by their canonical search hash. The outcome is
+    tracked by the `speculative_search.hit` and `speculative_search.miss`
+    counters.
+
+    Args:
+        structured_query (LinkedInSearchParamsDto): The structured query from the LLM.
+        speculative_search (tuple[LinkedInSearchParamsDto, asyncio.Task] | None):
+            The speculative structured query and its search, if one was started.
+        search_mode (SearchModeEnum): Where to search for talents.
+
+    Returns:
+        list[str]: The talent ids, without duplicates.
+    """
+    if speculative_search is not None:
+        speculative_query, task = speculative_search
+        if speculative_query.get_search_hash() == structured_query.get_search_hash():
+            try:
+                talent_ids = await task
+                metrics.increment("speculative_search.hit")
+                return talent_ids
+            except Exception as e:
+                log_message(
+                    level="warning",
+                    event="Speculative search failed",
+                    error=repr(e),
+                )
+        else:
+            await cancel_speculative_search(speculative_search)
+        metrics.increment("speculative_search.miss")
+
+    return await search_talent_ids(
+        structured_query=structured_query, search_mode=search_mode
+    )
+
+
+async def run_talent_query(
+    talent_query: TalentQuery,
+    db_session: Session,
+    llm_semaphore: asyncio.Semaphore | None = None,
+) -> TalentQuery:
+    """Structure the natural language query with the LLM and search the talent pool.
+
+    The status of the talent query is updated after each stage, and set to
+    failed if any stage raises. While the LLM structures the query, the
+    talent pool is searched with the rule-based parse of the query, see
+    `start_speculative_search`. A cancelled talent query, e.g. on shutdown,
+    is failed too.
+
+    Every database step ends its transaction, so no pooled connection is
+    held while the LLM or the talent pool is awaited. The talent query is not
+    refreshed after a commit, the values used between the steps are read once
+    up front.
+
+    Args:
+        talent_query (TalentQuery): The pending talent query.
+        db_session (Session): The database session.
+        llm_semaphore (asyncio.Semaphore | None): Held while the LLM structures the query.
+
+    Returns:
+        TalentQuery: The finished talent query.
+    """
+    talent_query_id = talent_query.id
+    natural_language_query = talent_query.nature_language_query
+    search_mode = SearchModeEnum(talent_query.search_mode)
+    speculative_search = None
+    try:
+        await run_in_threadpool(
+            update_talent_query_status,
+            talent_query=talent_query,
+            status=TalentQueryStatusEnum.STRUCTURING,
+            db_session=db_session,
+        )
+
+        # search with a cheap parse of the query while waiting for the LLM
+        speculative_search = start_speculative_search(
+            natural_language_query=natural_language_query,
+            search_mode=search_mode,
+        )
+
+        # get structured query from cache or LLM
+        start = time.monotonic()
+        async with llm_semaphore or contextlib.nullcontext():
+            structured_query, source, llm_usage = await get_structured_query(
+                natural_language_query=natural_language_query,
+                db_session=db_session,
+            )
+        structuring_latency_ms = int((time.monotonic() - start) * 1000)
+        log_message(
+            level="info",
+            event="Structured query generated",
+            talent_query_id=talent_query_id,
+            structured_query=structured_query,
+            source=source.value,
+            llm_usage=llm_usage.dict() if llm_usage else None,
+        )
+
+        await run_in_threadpool(
+            save_structured_query,
+            talent_query=talent_query,
+            structured_query=structured_query,
+            db_session=db_session,
+            source=source,
+            llm_usage=llm_usage,
+            structuring_latency_ms=structuring_latency_ms,
+        )
+
+        # use talent pool API and/or the stored talents to get talent ids
+        start = time.monotonic()
+        talent_ids = await get_talent_ids_with_speculation(
+            structured_query=structured_query,
+            speculative_search=speculative_search,
+            search_mode=search_mode,
+        )
+        if settings.TALENT_RERANK_ENABLED:
+            talent_ids = await run_in_threadpool(
+                rerank_talent_ids,
+                talent_ids=talent_ids,
+                nature_language_query=natural_language_query,
+                structured_query=structured_query,
+                depth=settings.TALENT_RERANK_DEPTH,
+                db_session=db_session,
+            )
+        talent_query = await run_in_threadpool(
+            save_talent_query_result,
+            talent_query=talent_query,
+            talent_ids=talent_ids,
+            db_session=db_session,
+            search_latency_ms=int((time.monotonic() - start) * 1000),
+        )
+        log_message(
+            level="info",
+            event="Saved talent_query with results",
+            talent_query_id=talent_query_id,
+        )
+        return talent_query
+    except asyncio.CancelledError:
+        if speculative_search is not None:
+            speculative_search[1].cancel()
+        log_message(
+            level="error",
+            event="Talent query cancelled",
+            talent_query_id=talent_query_id,
+        )
+        # a cancelled task must not await again, the status is saved inline
+        db_session.rollback()
+        update_talent_query_status(
+            talent_query=talent_query,
+            status=TalentQueryStatusEnum.FAILED,
+            db_session=db_session,
+            error_message="Cancelled",
+        )
+        raise
+    except Exception as e:
+        await cancel_speculative_search(speculative_search)
+        log_message(
+            level="error",
+            event="Talent query failed",
+            talent_query_id=talent_query_id,
+            error=repr(e),
+        )
+        db_session.rollback()
+        await run_in_threadpool(
+            update_talent_query_status,
+            talent_query=talent_query,
+            status=TalentQueryStatusEnum.FAILED,
+            db_session=db_session,
+            error_message=str(e),
+        )
+        raise
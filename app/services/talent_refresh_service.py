@@ -0,0 +1,190 @@
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.infrastructure import metrics
+from app.infrastructure.logger import log_message
+from app.services.talent_pool_service import (
+    get_linkedin_member_details_async,
+    is_talent_pool_available,
+)
+from app.services.talent_service import (
+    flush_talent_views,
+    get_stale_talent_ids,
+    upsert_talents,
+)
+from app.utils.lru_cache import TTLLRUCache
+from app.utils.retry_budget import RetryBudget
+
+# a talent that can not be collected is not picked again for a day
+FAILED_REFRESH_RETRY_SECONDS = 24 * 60 * 60
+
+
+class TalentRefresher:
+    """
+    Collect stored talents again in the background, so a stale profile can be
+    served at once and updated for the next request.
+
+    A talent is queued at most once at a time, at most `max_concurrency`
+    talents are collected at the same time, and nothing is collected while
+    the talent pool circuit breaker is open.
+
+    Once started, the refresher also sweeps the stored talents: every
+    `interval_seconds` it collects again a batch of the stale talents, the
+    most recently viewed first.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queued: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._failed = TTLLRUCache(
+            max_size=10_000, ttl_seconds=FAILED_REFRESH_RETRY_SECONDS
+        )
+        self._sweep_task: asyncio.Task | None = None
+
+    def schedule(self, talent_ids: list[str]) -> None:
+        """Queue the talents to be collected again"""
+        talent_ids = [
+            talent_id for talent_id in talent_ids if talent_id not in self._queued
+        ]
+        if not talent_ids:
+            return
+
+        self._queued.update(talent_ids)
+        task = asyncio.create_task(self._refresh(talent_ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def refresh(self, talent_ids: list[str]) -> int:
+        """Collect the talents again and update them, returns the number updated"""
+        if not is_talent_pool_available():
+            metrics.increment("talent_refresh.skipped", len(talent_ids))
+            return 0
+
+        # background work never spends retries
+        retry_budget = RetryBudget(max_retries=0)
+
+        async def collect(talent_id: str) -> dict:
+            async with self._semaphore:
+                return await get_linkedin_member_details_async(
+                    talent_id, retry_budget=retry_budget
+                )
+
+        talent_details_json = await asyncio.gather(
+            *[collect(talent_id) for talent_id in talent_ids],
+            return_exceptions=True,
+        )
+        collected = []
+        for talent_id, talent_detail_json in zip(talent_ids, talent_details_json):
+            if isinstance(talent_detail_json, Exception):
+                log_message(
+                    level="error",
+                    event="Failed to refresh talent",
+                    talent_id=talent_id,
+                    error=repr(talent_detail_json),
+                )
+                self._failed.set(talent_id, True)
+                continue
+            collected.append(talent_detail_json)
+
+        if not collected:
+            return 0
+
+        db_session = SessionLocal()
+        try:
+            updated_talents = await run_in_threadpool(
+                upsert_talents, talent_details_json=collected, db_session=db_session
+            )
+        finally:
+            db_session.close()
+        metrics.increment("talent_refresh.refreshed", len(updated_talents))
+        return len(updated_talents)
+
+    async def _refresh(self, talent_ids: list[str]) -> None:
+        try:
+            await self.refresh(talent_ids)
+        except Exception as e:
+            log_message(
+                level="error",
+                event="Talent refresh failed",
+                talent_ids=talent_ids,
+                error=repr(e),
+            )
+        finally:
+            self._queued.difference_update(talent_ids)
+
+    def start(self, interval_seconds: float, batch_size: int) -> None:
+        """Start sweeping the stale talents in the background"""
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(
+                self._sweep(interval_seconds, batch_size)
+            )
+
+    async def refresh_stale_talents(self, batch_size: int) -> int:
+        """Collect again a batch of stale talents, returns the number updated"""
+        db_session = SessionLocal()
+        try:
+            # the views since the last sweep decide which talents go first
+            await run_in_threadpool(flush_talent_views, db_session=db_session)
+            # over-fetch to skip the talents that are queued or failed recently
+            stale_talent_ids = await run_in_threadpool(
+                get_stale_talent_ids, limit=batch_size * 2, db_session=db_session
+            )
+        finally:
+            db_session.close()
+
+        talent_ids = [
+            talent_id
+            for talent_id in stale_talent_ids
+            if talent_id not in self._queued and not self._failed.get(talent_id)
+        ][:batch_size]
+        if not talent_ids:
+            return 0
+
+        self._queued.update(talent_ids)
+        try:
+            return await self.refresh(talent_ids)
+        finally:
+            self._queued.difference_update(talent_ids)
+
+    async def _sweep(self, interval_seconds: float, batch_size: int) -> None:
+        while True:
+            try:
+                refreshed = await self.refresh_stale_talents(batch_size)
+                if refreshed:
+                    log_message(
+                        level="info",
+                        event="Refreshed stale talents",
+                        refreshed=refreshed,
+                    )
+            except Exception as e:
+                log_message(
+                    level="error", event="Stale talent sweep failed", error=repr(e)
+                )
+            await asyncio.sleep(interval_seconds)
+
+    async def shutdown(self) -> None:
+        """Cancel the refreshes that are still running and save the pending views"""
+        tasks = list(self._tasks)
+        if self._sweep_task:
+            tasks.append(self._sweep_task)
+            self._sweep_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        db_session = SessionLocal()
+        try:
+            await run_in_threadpool(flush_talent_views, db_session=db_session)
+        except Exception as e:
+            log_message(
+                level="error", event="Failed to save talent views", error=repr(e)
+            )
+        finally:
+            db_session.close()
+
+
+talent_refresher = TalentRefresher(max_concurrency=settings.TALENT_REFRESH_CONCURRENCY)
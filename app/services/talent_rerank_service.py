@@ -0,0 +1,187 @@
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session, load_only
+
+from app.dto.linkedin_search_params_dto import LinkedInSearchParamsDto
+from app.infrastructure import metrics
+from app.models.talent_model import Talent
+from app.services.local_talent_search_service import SKILL_LIST_KEY, SKILL_NAME_KEY
+from app.utils.bm25 import bm25_scores, tokenize
+
+# weights of the normalized features in the relevance score
+BM25_WEIGHT = 0.4
+TITLE_HIT_WEIGHT = 0.2
+COUNTRY_HIT_WEIGHT = 0.1
+EXPERIENCE_WEIGHT = 0.05
+CONNECTIONS_WEIGHT = 0.05
+# the talent pool order
+POSITION_WEIGHT = 0.2
+
+
+def get_rerank_talents(talent_ids: list[str], db_session: Session) -> list[Talent]:
+    """
+    Get the stored talents with only the columns used by the ranking
+    """
+    stmt = (
+        select(Talent)
+        .where(Talent.core_signal_id.in_(talent_ids))
+        .options(
+            load_only(
+                Talent.core_signal_id,
+                Talent.title,
+                Talent.summary,
+                Talent.country,
+                Talent.experience_count,
+                Talent.connections_count,
+                Talent.member_skills_collection,
+            )
+        )
+    )
+    return db_session.execute(stmt).scalars().all()
+
+
+def get_talent_skills(talent: Talent) -> list[str]:
+    """
+    The skill names of the talent
+    """
+    skills = []
+    for item in talent.member_skills_collection or []:
+        skill = (item.get(SKILL_LIST_KEY) or {}).get(SKILL_NAME_KEY)
+        if skill:
+            skills.append(skill)
+    return skills
+
+
+def get_talent_document(talent: Talent | None) -> list[str]:
+    """
+    The tokens of the title, summary and skills of the talent
+    """
+    if talent is None:
+        return []
+    text = " ".join(
+        [talent.title or "", talent.summary or "", *get_talent_skills(talent)]
+    )
+    return tokenize(text)
+
+
+def normalize(values: np.ndarray) -> np.ndarray:
+    """
+    Scale the values to [0, 1] by their maximum
+    """
+    maximum = values.max(initial=0.0)
+    if maximum <= 0:
+        return np.zeros_like(values)
+    return values / maximum
+
+
+def fill_unknown(values: np.ndarray, known: np.ndarray) -> np.ndarray:
+    """
+    Give the talents that are not stored the mean value of the stored ones
+    """
+    if not known.any():
+        return values
+    return np.where(known, values, values[known].mean())
+
+
+def score_talents(
+    talent_ids: list[str],
+    talents_by_id: dict[str, Talent],
+    nature_language_query: str,
+    structured_query: LinkedInSearchParamsDto,
+) -> np.ndarray:
+    """Relevance score of each talent id, in the order of `talent_ids`.
+
+    Combines BM25 of the query text over the title, summary and skills, the
+    structured matches (title and country), the experience and connections
+    counts, and the position in the talent pool result. Talents that are not
+    stored get the mean of each feature over the stored talents, so being
+    stored does not rank a talent higher by itself, only being a better
+    match than the average stored talent does.
+
+    Args:
+        talent_ids (list[str]): The talent ids in the talent pool order.
+        talents_by_id (dict[str, Talent]): The stored talents by id.
+        nature_language_query (str): The natural language query from the user.
+        structured_query (LinkedInSearchParamsDto): The structured query.
+
+    Returns:
+        np.ndarray: The scores.
+    """
+    talents = [talents_by_id.get(talent_id) for talent_id in talent_ids]
+    known = np.array([talent is not None for talent in talents])
+    query_terms = tokenize(
+        " ".join(
+            [
+                nature_language_query,
+                *structured_query.experience_title,
+                *structured_query.keyword,
+            ]
+        )
+    )
+    bm25 = bm25_scores(query_terms, [get_talent_document(t) for t in talents])
+
+    titles = [(talent.title or "").casefold() if talent else "" for talent in talents]
+    wanted_titles = [title.casefold() for title in structured_query.experience_title]
+    title_hit = np.array(
+        [any(wanted in title for wanted in wanted_titles) for title in titles],
+        dtype=float,
+    )
+    wanted_countries = set(structured_query.country)
+    country_hit = np.array(
+        [bool(talent and talent.country in wanted_countries) for talent in talents],
+        dtype=float,
+    )
+    experience = np.log1p(
+        np.array([(t and t.experience_count) or 0 for t in talents], dtype=float)
+    )
+    connections = np.log1p(
+        np.array([(t and t.connections_count) or 0 for t in talents], dtype=float)
+    )
+    position = 1 - np.arange(len(talent_ids)) / max(len(talent_ids), 1)
+
+    return (
+        BM25_WEIGHT * fill_unknown(normalize(bm25), known)
+        + TITLE_HIT_WEIGHT * fill_unknown(title_hit, known)
+        + COUNTRY_HIT_WEIGHT * fill_unknown(country_hit, known)
+        + EXPERIENCE_WEIGHT * fill_unknown(normalize(experience), known)
+        + CONNECTIONS_WEIGHT * fill_unknown(normalize(connections), known)
+        + POSITION_WEIGHT * position
+    )
+
+
+def rerank_talent_ids(
+    talent_ids: list[str],
+    nature_language_query: str,
+    structured_query: LinkedInSearchParamsDto,
+    depth: int,
+    db_session: Session,
+) -> list[str]:
+    """Order the first `depth` talent ids by relevance to the query.
+
+    The ids after `depth` keep the talent pool order.
+
+    Args:
+        talent_ids (list[str]): The talent ids in the talent pool order.
+        nature_language_query (str): The natural language query from the user.
+        structured_query (LinkedInSearchParamsDto): The structured query.
+        depth (int): The number of talent ids to rank.
+        db_session (Session): The database session.
+
+    Returns:
+        list[str]: The reranked talent ids.
+    """
+    head, tail = talent_ids[:depth], talent_ids[depth:]
+    talents = get_rerank_talents(talent_ids=head, db_session=db_session)
+    if not talents:
+        return talent_ids
+
+    talents_by_id = {talent.core_signal_id: talent for talent in talents}
+    scores = score_talents(
+        talent_ids=head,
+        talents_by_id=talents_by_id,
+        nature_language_query=nature_language_query,
+        structured_query=structured_query,
+    )
+    order = np.argsort(-scores, kind="stable")
+    metrics.increment("talent_rerank.ranked", len(talents))
+    return [head[index] for index in order] + tail
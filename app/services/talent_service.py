@@ -1,71 +1,494 @@
 import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable
 
-import aiohttp
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import orjson
+from sqlalchemy import bindparam, func, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, load_only, undefer
+from starlette.concurrency import run_in_threadpool
 
+from app.config.settings import settings
+from app.enums.talent_fields_enum import TalentFieldsEnum
+from app.infrastructure import metrics
+from app.infrastructure.logger import log_message
 from app.models.talent_model import Talent
-from app.services.talent_pool_service import get_linkedin_member_details_async
+from app.services.talent_pool_service import (
+    get_linkedin_member_details_async,
+    new_collect_retry_budget,
+)
+from app.utils.byte_lru_cache import ByteLRUCache
+from app.utils.payload_utils import compress_payload
+
+
+# the columns a result list needs, the member_*_collection columns are left out
+TALENT_SUMMARY_COLUMNS = (
+    Talent.core_signal_id,
+    Talent.name,
+    Talent.title,
+    Talent.location,
+    Talent.country,
+    Talent.industry,
+    Talent.url,
+    Talent.logo_url,
+    Talent.connections_count,
+    Talent.experience_count,
+    Talent.last_updated,
+    Talent.created_at,
+    Talent.updated_at,
+)
+
+# bookkeeping columns left out of the talent details, last_viewed_at changes on
+# every view and would go stale in the serialized talent cache
+TALENT_INTERNAL_COLUMNS = ("raw_payload", "last_viewed_at")
+
+# read from the table, inspecting the mapper here would configure every model
+# before the app has imported them all
+TALENT_COLLECTIONS = tuple(
+    column.key
+    for column in Talent.__table__.columns
+    if column.key.endswith("_collection")
+)
+
+# serialized talents by (core_signal_id, updated_at, fields), a refresh changes
+# updated_at so an outdated entry is never read again and ages out of the LRU
+_talent_json_cache = ByteLRUCache(max_bytes=settings.TALENT_JSON_CACHE_MAX_BYTES)
+
+# view times not written to the database yet, flushed by the talent refresher
+MAX_PENDING_TALENT_VIEWS = 100_000
+_pending_talent_views: dict[str, datetime] = {}
+_pending_talent_views_lock = threading.Lock()
+
+
+def get_talents_in_db(
+    talent_ids: list[str],
+    db_session: Session,
+    fields: TalentFieldsEnum = TalentFieldsEnum.FULL,
+) -> list[Talent]:
+    """
+    Get the talents that are already stored in the database, only the summary
+    columns are loaded for `TalentFieldsEnum.SUMMARY`
+    """
+    stmt = select(Talent).where(Talent.core_signal_id.in_(talent_ids))
+    if fields == TalentFieldsEnum.SUMMARY:
+        stmt = stmt.options(load_only(*TALENT_SUMMARY_COLUMNS))
+    else:
+        stmt = stmt.options(undefer(Talent.raw_payload))
+    return db_session.execute(stmt).scalars().all()
+
+
+def get_talent_in_db(core_signal_id: str, db_session: Session) -> Talent | None:
+    """
+    Get a stored talent with all its columns
+    """
+    stmt = (
+        select(Talent)
+        .where(Talent.core_signal_id == core_signal_id)
+        .options(undefer(Talent.raw_payload))
+    )
+    return db_session.execute(stmt).scalars().first()
+
+
+def upsert_talents(talent_details_json: list[dict], db_session: Session) -> list[Talent]:
+    """
+    Insert the collected talents, or update them if they are already stored,
+    in a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING statement.
+
+    Args:
+        talent_details_json (list[dict]): The talent details from the talent pool API.
+        db_session (Session): The database session.
+
+    Returns:
+        list[Talent]: The stored talents.
+    """
+    # one row per talent, ON CONFLICT can not update the same row twice
+    values_by_id = {}
+    for talent_detail_json in talent_details_json:
+        values = get_talent_values_from_json(talent_detail_json=talent_detail_json)
+        values["updated_at"] = datetime.utcnow()
+        values_by_id[values["core_signal_id"]] = values
+    if not values_by_id:
+        return []
+
+    rows = list(values_by_id.values())
+    stmt = insert(Talent).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Talent.core_signal_id],
+        set_={
+            key: stmt.excluded[key] for key in rows[0] if key != "core_signal_id"
+        },
+    )
+    talents = (
+        db_session.execute(
+            stmt.returning(Talent), execution_options={"populate_existing": True}
+        )
+        .scalars()
+        .all()
+    )
+    # keep the returned values loaded instead of expiring them on commit
+    for talent in talents:
+        db_session.expunge(talent)
+    db_session.commit()
+    return talents
+
+
+def get_talent_versions_in_db(talent_ids: list[str], db_session: Session) -> list:
+    """
+    Get the core_signal_id, created_at and updated_at of the stored talents
+    """
+    stmt = select(
+        Talent.core_signal_id, Talent.created_at, Talent.updated_at
+    ).where(Talent.core_signal_id.in_(talent_ids))
+    return db_session.execute(stmt).all()
+
+
+def get_serialized_talents_in_db(
+    talent_ids: list[str],
+    db_session: Session,
+    fields: TalentFieldsEnum = TalentFieldsEnum.FULL,
+) -> tuple[dict[str, bytes], list]:
+    """
+    Get the JSON of the stored talents, see `serialize_talent`.
+
+    Only the versions of the talents are read first, the talents whose JSON
+    is cached for that version are not loaded from the database.
+
+    Args:
+        talent_ids (list[str]): The talent ids.
+        db_session (Session): The database session.
+        fields (TalentFieldsEnum): The columns of each talent.
+
+    Returns:
+        tuple[dict[str, bytes], list]: The JSON by talent id, and the versions
+            of the stored talents to check their staleness.
+    """
+    talent_versions = get_talent_versions_in_db(
+        talent_ids=talent_ids, db_session=db_session
+    )
+    talent_json_by_id = {}
+    for talent_version in talent_versions:
+        talent_json = _talent_json_cache.get(
+            (talent_version.core_signal_id, talent_version.updated_at, fields.value)
+        )
+        if talent_json is not None:
+            talent_json_by_id[talent_version.core_signal_id] = talent_json
+
+    missing_talent_ids = [
+        talent_version.core_signal_id
+        for talent_version in talent_versions
+        if talent_version.core_signal_id not in talent_json_by_id
+    ]
+    metrics.increment("talent_json_cache.hit", len(talent_json_by_id))
+    metrics.increment("talent_json_cache.miss", len(missing_talent_ids))
+    if missing_talent_ids:
+        talents = get_talents_in_db(
+            talent_ids=missing_talent_ids, db_session=db_session, fields=fields
+        )
+        for talent in talents:
+            talent_json = orjson.dumps(serialize_talent(talent, fields=fields))
+            _talent_json_cache.set(
+                (talent.core_signal_id, talent.updated_at, fields.value), talent_json
+            )
+            talent_json_by_id[talent.core_signal_id] = talent_json
+        metrics.set_gauge("talent_json_cache.bytes", _talent_json_cache.size)
+    return talent_json_by_id, talent_versions
+
+
+def record_talent_views(talent_ids: list[str]) -> None:
+    """
+    Remember that the talents were viewed now, `last_viewed_at` is written
+    later in one batch by `flush_talent_views`
+    """
+    viewed_at = datetime.utcnow()
+    with _pending_talent_views_lock:
+        for talent_id in talent_ids:
+            if (
+                talent_id not in _pending_talent_views
+                and len(_pending_talent_views) >= MAX_PENDING_TALENT_VIEWS
+            ):
+                metrics.increment("talent_views.dropped")
+                continue
+            _pending_talent_views[talent_id] = viewed_at
+
+
+def flush_talent_views(db_session: Session) -> int:
+    """
+    Set `last_viewed_at` of the talents viewed since the last flush, without
+    touching `updated_at`, returns the number of talents.
+    """
+    with _pending_talent_views_lock:
+        views = dict(_pending_talent_views)
+        _pending_talent_views.clear()
+    if not views:
+        return 0
+
+    talents = Talent.__table__
+    stmt = (
+        update(talents)
+        .where(talents.c.core_signal_id == bindparam("talent_id"))
+        .values(
+            last_viewed_at=bindparam("viewed_at"), updated_at=talents.c.updated_at
+        )
+    )
+    # in id order, so concurrent flushes lock the rows in the same order
+    db_session.execute(
+        stmt,
+        [
+            {"talent_id": talent_id, "viewed_at": views[talent_id]}
+            for talent_id in sorted(views)
+        ],
+    )
+    db_session.commit()
+    return len(views)
+
+
+def get_stale_talent_ids(limit: int, db_session: Session) -> list[str]:
+    """
+    Get the ids of the stale talents, the most recently viewed first.
+
+    Args:
+        limit (int): The maximum number of ids.
+        db_session (Session): The database session.
+
+    Returns:
+        list[str]: The core_signal_ids of the stale talents.
+    """
+    collected_at = func.coalesce(Talent.updated_at, Talent.created_at)
+    freshness = timedelta(days=settings.TALENT_FRESHNESS_DAYS)
+    stmt = (
+        select(Talent.core_signal_id)
+        .where(collected_at < datetime.utcnow() - freshness)
+        .order_by(Talent.last_viewed_at.desc().nulls_last(), collected_at)
+        .limit(limit)
+    )
+    return db_session.execute(stmt).scalars().all()
+
+
+def is_talent_stale(talent: Talent) -> bool:
+    """
+    Whether the talent was collected longer than the freshness window ago
+    """
+    collected_at = talent.updated_at or talent.created_at
+    if collected_at is None:
+        return True
+    freshness = timedelta(days=settings.TALENT_FRESHNESS_DAYS)
+    return collected_at < datetime.utcnow() - freshness
+
+
+def serialize_talent(
+    talent: Talent, fields: TalentFieldsEnum = TalentFieldsEnum.FULL
+) -> dict:
+    """
+    Convert the talent model to a dictionary of its columns, the collections
+    of the full details are read from the raw payload when it is stored
+    """
+    if fields == TalentFieldsEnum.SUMMARY:
+        return {
+            column.key: getattr(talent, column.key)
+            for column in TALENT_SUMMARY_COLUMNS
+        }
+    talent_detail = {
+        column.key: getattr(talent, column.key)
+        for column in inspect(Talent).column_attrs
+        if column.key not in TALENT_INTERNAL_COLUMNS
+    }
+    raw_payload = talent.get_raw_payload()
+    if raw_payload is not None:
+        for key in TALENT_COLLECTIONS:
+            talent_detail[key] = raw_payload.get(key)
+    return talent_detail
+
+
+def serialize_talent_json(
+    talent_detail_json: dict, fields: TalentFieldsEnum = TalentFieldsEnum.FULL
+) -> dict:
+    """
+    Convert the talent details from the talent pool API to the same
+    dictionary as `serialize_talent` gives for the stored talent
+    """
+    values = get_talent_values_from_json(
+        talent_detail_json=talent_detail_json, include_raw_payload=False
+    )
+    talent_detail = serialize_talent(Talent(**values), fields=fields)
+    if fields == TalentFieldsEnum.FULL:
+        for key in TALENT_COLLECTIONS:
+            talent_detail[key] = talent_detail_json.get(key)
+    return talent_detail
+
+
+def notify_stale_talents(
+    talents: list, on_stale: Callable[[list[str]], None]
+) -> None:
+    stale_talent_ids = [
+        talent.core_signal_id for talent in talents if is_talent_stale(talent)
+    ]
+    if stale_talent_ids:
+        on_stale(stale_talent_ids)
 
 
 async def get_talent_details_by_ids(
-    talent_ids: list[str], db_session: Session
-) -> list[dict]:
+    talent_ids: list[str],
+    db_session: Session,
+    on_stale: Callable[[list[str]], None] | None = None,
+    fields: TalentFieldsEnum = TalentFieldsEnum.FULL,
+) -> list[bytes]:
     """
-    Get talent details by ids
+    Get the JSON of the talent details by ids, in the order of `talent_ids`
+
+    Stored and collected talents have the same shape, see `serialize_talent`.
+    A member that can not be collected from the talent pool API is returned
+    as `{"core_signal_id": ..., "error": ...}` instead of failing the page.
+    Stored talents are returned even when stale, their ids are passed to
+    `on_stale` to be collected again in the background. With
+    `TalentFieldsEnum.SUMMARY` each talent is returned as its summary columns
+    and the member_*_collection columns are not read from the database.
     """
 
-    talent_details = []
     talent_details_not_in_db = []
     # check the talent data is in the database
-    stmt = select(Talent).where(Talent.core_signal_id.in_(talent_ids))
-    talent_details_in_db = db_session.execute(stmt).scalars().all()
-    talent_ids_in_db = [talent.core_signal_id for talent in talent_details_in_db]
+    talent_details_by_id, talent_versions = await run_in_threadpool(
+        get_serialized_talents_in_db,
+        talent_ids=talent_ids,
+        db_session=db_session,
+        fields=fields,
+    )
     talent_ids_not_in_db = [
-        talent_id for talent_id in talent_ids if talent_id not in talent_ids_in_db
+        talent_id for talent_id in talent_ids if talent_id not in talent_details_by_id
     ]
+    if on_stale:
+        notify_stale_talents(talents=talent_versions, on_stale=on_stale)
 
     # if not, get the talent details from talent pool API
     if talent_ids_not_in_db:
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                get_linkedin_member_details_async(talent_id, session)
-                for talent_id in talent_ids_not_in_db
-            ]
-            talent_details_json = await asyncio.gather(*tasks)
-            for talent_detail_json in talent_details_json:
-                talent_details.append(talent_detail_json)
-                talent_model = get_talent_model_from_json(
-                    talent_detail_json=talent_detail_json
+        retry_budget = new_collect_retry_budget(member_count=len(talent_ids_not_in_db))
+        tasks = [
+            get_linkedin_member_details_async(talent_id, retry_budget=retry_budget)
+            for talent_id in talent_ids_not_in_db
+        ]
+        talent_details_json = await asyncio.gather(*tasks, return_exceptions=True)
+        for talent_id, talent_detail_json in zip(
+            talent_ids_not_in_db, talent_details_json
+        ):
+            if isinstance(talent_detail_json, Exception):
+                log_message(
+                    level="error",
+                    event="Failed to collect talent",
+                    talent_id=talent_id,
+                    error=repr(talent_detail_json),
                 )
-                talent_details_not_in_db.append(talent_model)
+                talent_details_by_id[talent_id] = orjson.dumps(
+                    {"core_signal_id": talent_id, "error": str(talent_detail_json)}
+                )
+                continue
 
-    # TODO: batch store talent details not in database to database
-    if talent_details_not_in_db:
-        db_session.add_all(talent_details_not_in_db)
-        db_session.commit()
-        # Refresh each instance individually
-        for talent_model in talent_details_not_in_db:
-            db_session.refresh(talent_model)
+            talent_details_by_id[talent_id] = orjson.dumps(
+                serialize_talent_json(
+                    talent_detail_json=talent_detail_json, fields=fields
+                )
+            )
+            talent_details_not_in_db.append(talent_detail_json)
 
-    # add talent details in db to talent_details
-    talent_details.extend(talent_details_in_db)
+    await run_in_threadpool(
+        upsert_talents,
+        talent_details_json=talent_details_not_in_db,
+        db_session=db_session,
+    )
+    record_talent_views(talent_ids)
 
-    return talent_details
+    return [talent_details_by_id[talent_id] for talent_id in talent_ids]
 
 
-def get_talent_model_from_json(talent_detail_json: dict) -> Talent:
+async def stream_talent_details_by_ids(
+    talent_ids: list[str],
+    db_session: Session,
+    on_stale: Callable[[list[str]], None] | None = None,
+    fields: TalentFieldsEnum = TalentFieldsEnum.FULL,
+) -> AsyncIterator[bytes]:
     """
-    Store talent details in the database.
+    Yield the JSON of the talent details by ids as soon as each one is available.
+
+    Talents stored in the database are yielded first, then each talent
+    collected from the talent pool API as it arrives. A member that can not
+    be collected is yielded as `{"core_signal_id": ..., "error": ...}`.
+    The collected talents are stored in the database at the end. The ids of
+    stale stored talents are passed to `on_stale`. `fields` selects the
+    columns of each talent.
+    """
+    talent_details_in_db, talent_versions = await run_in_threadpool(
+        get_serialized_talents_in_db,
+        talent_ids=talent_ids,
+        db_session=db_session,
+        fields=fields,
+    )
+    if on_stale:
+        notify_stale_talents(talents=talent_versions, on_stale=on_stale)
+    for talent_detail in talent_details_in_db.values():
+        yield talent_detail
+
+    talent_ids_not_in_db = [
+        talent_id for talent_id in talent_ids if talent_id not in talent_details_in_db
+    ]
+    record_talent_views(list(talent_details_in_db))
+    if not talent_ids_not_in_db:
+        return
+
+    retry_budget = new_collect_retry_budget(member_count=len(talent_ids_not_in_db))
+
+    async def collect(talent_id: str):
+        try:
+            return talent_id, await get_linkedin_member_details_async(
+                talent_id, retry_budget=retry_budget
+            )
+        except Exception as e:
+            return talent_id, e
+
+    talent_details_not_in_db = []
+    tasks = [collect(talent_id) for talent_id in talent_ids_not_in_db]
+    for task in asyncio.as_completed(tasks):
+        talent_id, talent_detail_json = await task
+        if isinstance(talent_detail_json, Exception):
+            log_message(
+                level="error",
+                event="Failed to collect talent",
+                talent_id=talent_id,
+                error=repr(talent_detail_json),
+            )
+            yield orjson.dumps(
+                {"core_signal_id": talent_id, "error": str(talent_detail_json)}
+            )
+            continue
+
+        talent_details_not_in_db.append(talent_detail_json)
+        yield orjson.dumps(
+            serialize_talent_json(talent_detail_json=talent_detail_json, fields=fields)
+        )
+
+    await run_in_threadpool(
+        upsert_talents,
+        talent_details_json=talent_details_not_in_db,
+        db_session=db_session,
+    )
+    record_talent_views([str(talent.get("id")) for talent in talent_details_not_in_db])
+
+
+def get_talent_values_from_json(
+    talent_detail_json: dict, include_raw_payload: bool = True
+) -> dict:
+    """
+    Map the talent details from the talent pool API to Talent column values.
+
+    The whole payload is stored compressed, only the hot collections are
+    kept as columns and the other collection columns are cleared.
 
     Args:
-        talent_details (dict): The talent details to store.
-        db_session (Session): The database session.
+        talent_detail_json (dict): The talent details from the talent pool API.
+        include_raw_payload (bool): Whether to compress the payload into `raw_payload`.
 
     Returns:
-        Talent: The stored Talent object.
+        dict: The column values of the Talent.
     """
-    talent = Talent(
+    values = dict(
         core_signal_id=str(talent_detail_json.get("id")),
         name=talent_detail_json.get("name"),
         first_name=talent_detail_json.get("first_name"),
@@ -95,64 +518,16 @@ def get_talent_model_from_json(talent_detail_json: dict) -> Talent:
         canonical_shorthand_name_hash=talent_detail_json.get(
             "canonical_shorthand_name_hash"
         ),
-        member_also_viewed_collection=talent_detail_json.get(
-            "member_also_viewed_collection"
-        ),
-        member_awards_collection=talent_detail_json.get("member_awards_collection"),
-        member_certifications_collection=talent_detail_json.get(
-            "member_certifications_collection"
-        ),
-        member_courses_collection=talent_detail_json.get("member_courses_collection"),
-        member_courses_suggestion_collection=talent_detail_json.get(
-            "member_courses_suggestion_collection"
-        ),
         member_education_collection=talent_detail_json.get(
             "member_education_collection"
         ),
         member_experience_collection=talent_detail_json.get(
             "member_experience_collection"
         ),
-        member_groups_collection=talent_detail_json.get("member_groups_collection"),
-        member_interests_collection=talent_detail_json.get(
-            "member_interests_collection"
-        ),
-        member_languages_collection=talent_detail_json.get(
-            "member_languages_collection"
-        ),
-        member_organizations_collection=talent_detail_json.get(
-            "member_organizations_collection"
-        ),
-        member_patents_collection=talent_detail_json.get("member_patents_collection"),
-        member_posts_see_more_urls_collection=talent_detail_json.get(
-            "member_posts_see_more_urls_collection"
-        ),
-        member_projects_collection=talent_detail_json.get("member_projects_collection"),
-        member_publications_collection=talent_detail_json.get(
-            "member_publications_collection"
-        ),
-        member_recommendations_collection=talent_detail_json.get(
-            "member_recommendations_collection"
-        ),
-        member_similar_profiles_collection=talent_detail_json.get(
-            "member_similar_profiles_collection"
-        ),
         member_skills_collection=talent_detail_json.get("member_skills_collection"),
-        member_test_scores_collection=talent_detail_json.get(
-            "member_test_scores_collection"
-        ),
-        member_volunteering_cares_collection=talent_detail_json.get(
-            "member_volunteering_cares_collection"
-        ),
-        member_volunteering_opportunities_collection=talent_detail_json.get(
-            "member_volunteering_opportunities_collection"
-        ),
-        member_volunteering_positions_collection=talent_detail_json.get(
-            "member_volunteering_positions_collection"
-        ),
-        member_volunteering_supports_collection=talent_detail_json.get(
-            "member_volunteering_supports_collection"
-        ),
-        member_websites_collection=talent_detail_json.get("member_websites_collection"),
     )
-
-    return talent
+    for key in TALENT_COLLECTIONS:
+        values.setdefault(key, None)
+    if include_raw_payload:
+        values["raw_payload"] = compress_payload(talent_detail_json)
+    return values
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from app.infrastructure import metrics
+
+T = TypeVar("T")
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter.
+
+    The limit grows by about one for every `limit` calls that finish within
+    `latency_target_seconds`, and is multiplied by `backoff_ratio` when a call
+    is slower than the target or fails with an overload error (at most once
+    per latency target, so one burst of slow calls backs off once). Calls
+    over the limit wait in a queue.
+
+    The limit, in-flight calls and queue depth are published as gauges
+    named `<name>.concurrency_limit`, `<name>.in_flight` and `<name>.queue_depth`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target_seconds: float,
+        is_overload: Callable[[Exception], bool],
+        backoff_ratio: float = 0.5,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_seconds = latency_target_seconds
+        self.backoff_ratio = backoff_ratio
+        self._is_overload = is_overload
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._queue_depth = 0
+        self._last_backoff = 0.0
+        self._condition = asyncio.Condition()
+        self._publish()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def has_capacity(self) -> bool:
+        """Whether a new call would run at once, without waiting in the queue"""
+        return self._queue_depth == 0 and self._in_flight < self.limit
+
+    async def run(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Run `func` once a slot is free and adjust the limit to how it went"""
+        await self._acquire()
+        start = time.monotonic()
+        try:
+            result = await func()
+        except Exception as e:
+            if self._is_overload(e):
+                self._backoff()
+            raise
+        else:
+            if time.monotonic() - start > self.latency_target_seconds:
+                self._backoff()
+            else:
+                self._grow()
+            return result
+        finally:
+            await self._release()
+
+    async def _acquire(self) -> None:
+        async with self._condition:
+            self._queue_depth += 1
+            self._publish()
+            try:
+                await self._condition.wait_for(
+                    lambda: self._in_flight < self.limit
+                )
+            finally:
+                self._queue_depth -= 1
+            self._in_flight += 1
+            self._publish()
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._publish()
+            self._condition.notify_all()
+
+    def _grow(self) -> None:
+        self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        self._publish()
+
+    def _backoff(self) -> None:
+        now = time.monotonic()
+        if now - self._last_backoff < self.latency_target_seconds:
+            return
+        self._last_backoff = now
+        self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"{self.name}.concurrency_limit", self.limit)
+        metrics.set_gauge(f"{self.name}.in_flight", self._in_flight)
+        metrics.set_gauge(f"{self.name}.queue_depth", self._queue_depth)
@@ -0,0 +1,46 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercase word tokens of the text.
+    """
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+def bm25_scores(
+    query_terms: list[str],
+    documents: list[list[str]],
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> np.ndarray:
+    """
+    Okapi BM25 score of every tokenized document for the query terms.
+
+    The inverse document frequencies are computed over `documents` only, so
+    the scores rank the documents against each other.
+    """
+    scores = np.zeros(len(documents))
+    if not documents or not query_terms:
+        return scores
+
+    lengths = np.array([len(document) for document in documents], dtype=float)
+    average_length = lengths.mean() or 1.0
+    counters = [Counter(document) for document in documents]
+    length_norm = k1 * (1 - b + b * lengths / average_length)
+
+    for term in set(query_terms):
+        frequencies = np.array([counter[term] for counter in counters], dtype=float)
+        document_frequency = np.count_nonzero(frequencies)
+        if not document_frequency:
+            continue
+        idf = np.log(
+            1 + (len(documents) - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+        scores += idf * frequencies * (k1 + 1) / (frequencies + length_norm)
+    return scores
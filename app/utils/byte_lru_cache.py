@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+
+class ByteLRUCache:
+    """
+    Thread-safe in-process LRU cache of bytes values, bounded by the total
+    size of the cached values instead of the number of entries.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached values in bytes"""
+        return self._size
+
+    def get(self, key: Hashable) -> bytes | None:
+        """Return the cached value, or None if it is missing"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: bytes) -> None:
+        """Cache the value, evicting the least recently used entries to stay under the cap"""
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._data[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,94 @@
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from app.infrastructure import metrics
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The circuit is open, the call was not made"""
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing service for a while.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail at once with CircuitOpenError. After `reset_timeout_seconds`
+    one trial call is let through (half open): a success closes the
+    circuit, a failure opens it again.
+
+    The state is published as the gauge `<name>.circuit_open` (0 or 1).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout_seconds: float,
+        is_failure: Callable[[Exception], bool],
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._is_failure = is_failure
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._publish()
+
+    @property
+    def state(self) -> str:
+        if (
+            self._state == OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout_seconds
+        ):
+            return HALF_OPEN
+        return self._state
+
+    def is_open(self) -> bool:
+        """Whether calls are currently rejected"""
+        return self.state == OPEN
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Run `func` unless the circuit is open"""
+        state = self.state
+        if state == OPEN:
+            metrics.increment(f"{self.name}.circuit_rejected")
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        if state == HALF_OPEN:
+            # let only this trial call through until it finishes
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+
+        try:
+            result = await func()
+        except Exception as e:
+            # other errors mean the service answered, so they count as success
+            if self._is_failure(e):
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        self._record_success()
+        return result
+
+    def _record_success(self) -> None:
+        self._failures = 0
+        self._state = CLOSED
+        self._publish()
+
+    def _record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"{self.name}.circuit_open", int(self._state == OPEN))
@@ -0,0 +1,29 @@
+import threading
+from collections import deque
+
+
+class LatencyTracker:
+    """
+    Keep the latest `window_size` latencies to estimate latency percentiles.
+    """
+
+    def __init__(self, window_size: int = 500, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, percentile: float) -> float | None:
+        """
+        The latency below which `percentile` percent of the recorded calls
+        finished, or None until `min_samples` calls are recorded.
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[index]
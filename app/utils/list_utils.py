@@ -3,3 +3,10 @@ def list_to_or_string(items: list[str]) -> str:
     Convert a list of strings to a single string with items separated by ' OR '.
     """
     return " OR ".join(f"({item})" for item in items)
+
+
+def or_string_to_list(value: str) -> list[str]:
+    """
+    Convert a string built by `list_to_or_string` back to the list of items.
+    """
+    return [item.strip()[1:-1] for item in value.split(" OR ")]
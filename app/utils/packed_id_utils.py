@@ -0,0 +1,32 @@
+import struct
+import sys
+
+# every member id is packed as a little-endian signed 64-bit integer
+PACKED_ID_SIZE = 8
+
+
+def pack_ids(ids: list[str]) -> bytes:
+    """
+    Pack numeric ids into bytes, keeping their order.
+    """
+    return struct.pack(f"<{len(ids)}q", *(int(id_) for id_ in ids))
+
+
+def unpack_ids(
+    data: bytes | memoryview, offset: int = 0, limit: int | None = None
+) -> list[str]:
+    """
+    Unpack `limit` ids starting at `offset` from bytes built by `pack_ids`,
+    without copying the rest of the buffer.
+    """
+    view = memoryview(data)
+    start = offset * PACKED_ID_SIZE
+    end = len(view) if limit is None else start + limit * PACKED_ID_SIZE
+    view = view[start:end]
+    view = view[: len(view) - len(view) % PACKED_ID_SIZE]
+
+    if sys.byteorder == "little":
+        values = view.cast("q")
+    else:
+        values = struct.unpack(f"<{len(view) // PACKED_ID_SIZE}q", view)
+    return [str(value) for value in values]
@@ -0,0 +1,47 @@
+import threading
+
+
+class RetryBudget:
+    """
+    Number of retries that a group of calls may spend together, so that one
+    request can not multiply the load on a struggling service.
+    """
+
+    def __init__(self, max_retries: int):
+        self.remaining = max_retries
+        self._lock = threading.Lock()
+
+    def spend(self) -> bool:
+        """Take one retry from the budget, returns False if it is exhausted"""
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+class RatioBudget:
+    """
+    Extra calls (e.g. hedges) allowed as a share of the calls made: every call
+    deposits `ratio` of a token, an extra call spends a whole one. At most
+    `max_balance` tokens are saved up for a burst.
+    """
+
+    def __init__(self, ratio: float, max_balance: float = 10):
+        self.ratio = ratio
+        self.max_balance = max_balance
+        self.balance = 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """Record a call"""
+        with self._lock:
+            self.balance = min(self.max_balance, self.balance + self.ratio)
+
+    def spend(self) -> bool:
+        """Take one extra call from the budget, returns False if it is exhausted"""
+        with self._lock:
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
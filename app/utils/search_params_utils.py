@@ -0,0 +1,46 @@
+import hashlib
+import json
+
+from app.utils.list_utils import or_string_to_list
+
+
+def _canonicalize_value(value: str | list[str]) -> str | list[str]:
+    if isinstance(value, str) and value.startswith("(") and value.endswith(")"):
+        value = or_string_to_list(value)
+
+    if isinstance(value, list):
+        items = {str(item).strip().casefold() for item in value}
+        return sorted(item for item in items if item)
+
+    return str(value).strip().casefold()
+
+
+def canonicalize_talent_pool_query_dict(query_dict: dict) -> dict:
+    """
+    Canonical form of a talent pool query dictionary, so that the same search
+    written differently compares equal: OR lists are split into sorted and
+    deduplicated lists, all values are case folded and empty values dropped.
+
+    Args:
+        query_dict (dict): The output of `LinkedInSearchParamsDto.get_talent_pool_query_dict`.
+
+    Returns:
+        dict: The canonical query dictionary.
+    """
+    canonical = {}
+    for key, value in query_dict.items():
+        if value is None:
+            continue
+        value = _canonicalize_value(value)
+        if value:
+            canonical[key] = value
+    return canonical
+
+
+def get_talent_pool_query_hash(query_dict: dict) -> str:
+    """
+    Stable hash of the canonical form of a talent pool query dictionary.
+    """
+    canonical = canonicalize_talent_pool_query_dict(query_dict)
+    canonical_json = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical_json.encode()).hexdigest()
@@ -0,0 +1,37 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one in-flight call.
+
+    The first caller starts the call, later callers with the same key wait
+    for the same future until it is done. Cancelling one caller does not
+    cancel the shared call.
+    """
+
+    def __init__(self):
+        self._futures: dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Whether a call with this key is running"""
+        return key in self._futures
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Run `func` for the key, or join the call already running for it"""
+        future = self._futures.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._futures[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._futures.get(key) is future:
+            del self._futures[key]
+        # avoid "exception was never retrieved" if every caller was cancelled
+        if not future.cancelled():
+            future.exception()